@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Построение BookSearchIndex и задержки запросов на большом каталоге"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from itertools import accumulate
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tasks"))
+
+from library_package.book_search import BookSearchIndex  # noqa: E402
+from library_package.library_model import Book  # noqa: E402
+
+LETTERS = "абвгдежзиклмнопрстуфхцчшэюя"
+
+
+def make_words(rng: random.Random, count: int) -> list[str]:
+    return [
+        "".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 10)))
+        for _ in range(count)
+    ]
+
+
+def make_books(count: int, seed: int = 1) -> list[Book]:
+    rng = random.Random(seed)
+    words = make_words(rng, 50_000)
+    surnames = make_words(rng, 20_000)
+    publishers = make_words(rng, 200)
+    # Частоты слов в названиях убывают примерно по закону Ципфа.
+    cumulative = list(accumulate(1 / (rank + 1) for rank in range(len(words))))
+    books = []
+    for i in range(count):
+        title = " ".join(
+            rng.choices(words, cum_weights=cumulative, k=rng.randint(1, 5))
+        )
+        author = f"{rng.choice(surnames)} {rng.choice(LETTERS)}."
+        books.append(Book(author, title, 1900 + i % 120, rng.choice(publishers), 1.0))
+    return books
+
+
+def latencies(function, queries: list[str]) -> tuple[float, float]:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        function(query)
+        timings.append(time.perf_counter() - start)
+    cuts = statistics.quantiles(timings, n=100)
+    return cuts[49] * 1000, cuts[98] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=1_000_000)
+    arguments = parser.parse_args()
+
+    books = make_books(arguments.books)
+    index = BookSearchIndex()
+    start = time.perf_counter()
+    for book in books:
+        index.add(book)
+    print(
+        f"книг {len(index)}, слов в словаре {len(index._vocabulary)}, "
+        f"построение {time.perf_counter() - start:.1f} с"
+    )
+
+    rng = random.Random(2)
+    sample = rng.sample(books, 500)
+    cases = {
+        "одно слово": [book.title.split()[-1] for book in sample],
+        "автор + слово": [
+            f"{book.author.split()[0]} {book.title.split()[0]}" for book in sample
+        ],
+        "слово + префикс": [
+            f"{book.title.split()[0]} {book.author[:3]}" for book in sample
+        ],
+    }
+    for name, queries in cases.items():
+        p50, p99 = latencies(lambda q: index.search(q, limit=10), queries)
+        print(f"  {name:>15}: p50 {p50:.2f} мс, p99 {p99:.2f} мс")
+    prefixes = [book.title[:2] for book in sample]
+    p50, p99 = latencies(lambda q: index.complete(q), prefixes)
+    print(f"  {'автодополнение':>15}: p50 {p50:.2f} мс, p99 {p99:.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
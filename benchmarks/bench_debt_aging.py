@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Помесячная разбивка долгов по давности: обход выдач против DebtAging"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tasks"))
+
+from library_package.debt_aging import DebtAging  # noqa: E402
+from library_package.library_model import Book, Subscriber  # noqa: E402
+
+
+def make_subscribers(count: int, loans: int, seed: int = 1) -> list[Subscriber]:
+    rng = random.Random(seed)
+    books = [
+        Book(f"Автор{i % 97}", f"Книга{i}", 2000, "Издательство", 10.0 + i % 500)
+        for i in range(1_000)
+    ]
+    start = date(2023, 1, 1)
+    subscribers = []
+    for i in range(count):
+        subscriber = Subscriber("Абонент", f"LIB{i:06}", loans)
+        subscriber.add_books(
+            (rng.choice(books), (start + timedelta(rng.randrange(365))).isoformat())
+            for _ in range(loans)
+        )
+        for j in range(0, loans, 4):
+            subscriber[j].mark_returned()
+        subscribers.append(subscriber)
+    return subscribers
+
+
+def scan(subscribers: list[Subscriber], as_of: date) -> list[float]:
+    """Та же разбивка обходом объектов — как без DebtAging"""
+    costs = [0.0, 0.0, 0.0]
+    for subscriber in subscribers:
+        for book in subscriber.find_overdue_books(as_of):
+            days = as_of.toordinal() - book._return_day
+            costs[0 if days <= 30 else 1 if days <= 60 else 2] += book.book.price
+    return costs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=100_000)
+    parser.add_argument("--loans", type=int, default=10)
+    arguments = parser.parse_args()
+
+    subscribers = make_subscribers(arguments.subscribers, arguments.loans)
+    months = [date(2023, month, 1) for month in range(2, 13)] + [date(2024, 1, 1)]
+
+    start = time.perf_counter()
+    expected = [scan(subscribers, as_of) for as_of in months]
+    scanned = time.perf_counter() - start
+
+    start = time.perf_counter()
+    aging = DebtAging.from_subscribers(subscribers)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    reports = [aging.report(as_of) for as_of in months]
+    vectorized = time.perf_counter() - start
+
+    for costs, report in zip(expected, reports):
+        assert all(
+            abs(a - b) < 1e-6 * max(a, 1) for a, b in zip(costs, report.totals()[1])
+        )
+    print(
+        f"выдач {len(aging)}, дат {len(months)}: обход {scanned:.2f} с, "
+        f"DebtAging сборка {built:.2f} с + отчёты {vectorized:.3f} с "
+        f"({vectorized / len(months) * 1e3:.1f} мс на дату)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Опрос долгов многих карточек: текущие суммы против полного пересмотра выдач"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tasks"))
+
+from library_package.library_model import Book, Debt, Subscriber  # noqa: E402
+
+
+def legacy_debt(subscriber: Subscriber) -> Debt:
+    overdue = [b for b in subscriber._books if b.is_overdue() and not b.returned]
+    return Debt(subscriber.name, subscriber.library_id, overdue)
+
+
+def make_cards(cards: int, loans: int) -> list[Subscriber]:
+    books = [
+        Book(f"Автор{i % 97}", f"Книга{i}", 1900 + i % 120, "Издательство", 10.0 + i)
+        for i in range(loans)
+    ]
+    result = []
+    for i in range(cards):
+        subscriber = Subscriber("Иванов", f"LIB{i:05d}", loans)
+        # Половина выдач просрочена, половина — нет.
+        subscriber.add_books(
+            (book, "2020-01-01" if j % 2 else "2999-01-01")
+            for j, book in enumerate(books)
+        )
+        result.append(subscriber)
+    return result
+
+
+def best_of(function, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    for cards, loans in ((5_000, 20), (1_000, 100)):
+        subscribers = make_cards(cards, loans)
+        old = best_of(lambda: [legacy_debt(s).total_cost for s in subscribers])
+        new = best_of(lambda: [s.generate_debt().total_cost for s in subscribers])
+        print(
+            f"{cards} карточек по {loans} выдач: было {old:.4f} с, "
+            f"стало {new:.4f} с ({old / new:.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Память на миллион выдач: Book/BorrowedBook против прежних версий классов.
+
+Отдельно — полная цена выдачи на карточке абонента с её индексами и учётом долгов.
+"""
+
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tasks"))
+
+from library_package.library_model import Book, BorrowedBook, Subscriber  # noqa: E402
+
+
+class LegacyBook:
+    def __init__(self, author, title, year, publisher, price) -> None:
+        self.author = author
+        self.title = title
+        self.year = year
+        self.publisher = publisher
+        self.price = price
+
+
+class LegacyBorrowedBook:
+    MAX_DAYS = 30
+
+    def __init__(self, book, issue_date: str) -> None:
+        self.book = book
+        self.issue_date = issue_date
+        issue_dt = datetime.strptime(issue_date, "%Y-%m-%d")
+        self.return_date = (issue_dt + timedelta(days=self.MAX_DAYS)).strftime(
+            "%Y-%m-%d"
+        )
+        self.returned = False
+
+
+def rows(count: int):
+    # Строки создаются заново для каждой записи, как при разборе файла.
+    for i in range(count):
+        yield (
+            "".join(("Автор ", str(i % 500))),
+            f"Книга {i}",
+            1900 + i % 120,
+            "".join(("Издательство ", str(i % 20))),
+            100.0 + i % 1000,
+            f"2024-{1 + i % 12:02}-{1 + i % 28:02}",
+        )
+
+
+def megabytes_per_million(book_cls, loan_cls, count: int) -> float:
+    tracemalloc.start()
+    loans = [
+        loan_cls(book_cls(author, title, year, publisher, price), issue_date)
+        for author, title, year, publisher, price, issue_date in rows(count)
+    ]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loans
+    return current / count * 1_000_000 / 2**20
+
+
+def megabytes_per_million_on_cards(count: int, card_size: int = 100) -> float:
+    tracemalloc.start()
+    cards = []
+    for i, (author, title, year, publisher, price, issue_date) in enumerate(
+        rows(count)
+    ):
+        if i % card_size == 0:
+            card = Subscriber("Абонент", f"LIB{i}", card_size)
+            cards.append(card)
+        card.add_book(Book(author, title, year, publisher, price), issue_date)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cards
+    return current / count * 1_000_000 / 2**20
+
+
+def main(count: int = 200_000) -> None:
+    before = megabytes_per_million(LegacyBook, LegacyBorrowedBook, count)
+    after = megabytes_per_million(Book, BorrowedBook, count)
+    on_cards = megabytes_per_million_on_cards(count)
+    print(f"Выдач: {count}, пересчёт на 1 млн")
+    print(f"  прежние классы: {before:8.1f} МиБ")
+    print(f"  текущие классы: {after:8.1f} МиБ ({after / before:.0%})")
+    print(f"  на карточках:   {on_cards:8.1f} МиБ (с индексами и учётом долгов)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Отчёт по большой карточке: str() против write_report в поток"""
+
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tasks"))
+
+from library_package.library_model import Book, Subscriber  # noqa: E402
+
+
+def measure(function) -> tuple[float, float]:
+    # Время и память меряются отдельно: tracemalloc замедляет выполнение.
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main() -> None:
+    loans = 200_000
+    subscriber = Subscriber("Иванов", "LIB001", loans)
+    subscriber.add_books(
+        (Book(f"Автор{i % 97}", f"Книга{i}", 2000, "Издательство", 1.0), "2024-01-01")
+        for i in range(loans)
+    )
+    with open(os.devnull, "w", encoding="utf-8") as stream:
+        for name, function in (
+            ("str()", lambda: stream.write(str(subscriber))),
+            ("write_report", lambda: subscriber.write_report(stream)),
+            ("страница 100", lambda: subscriber.write_report(stream, 150_000, 100)),
+        ):
+            elapsed, peak = measure(function)
+            print(f"{name:>13}: {elapsed:.3f} с, пик памяти {peak:.1f} МиБ")
+
+
+if __name__ == "__main__":
+    main()
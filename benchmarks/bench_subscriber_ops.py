@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Операторы +, &, - у Subscriber против прежних реализаций со сканированием"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tasks"))
+
+from library_package.library_model import Book, Subscriber  # noqa: E402
+
+
+def legacy_add(self: Subscriber, other: Subscriber) -> list:
+    books = self._books.copy()
+    count, size = len(books), max(self.size, other.size)
+    for book in other._books:
+        if book not in books and count < size:
+            books.append(book)
+            count += 1
+    return books
+
+
+def legacy_and(self: Subscriber, other: Subscriber) -> list:
+    books = []
+    for book in self._books:
+        if (
+            any(book.book == other_book.book for other_book in other._books)
+            and len(books) < Subscriber.MAX_SIZE
+        ):
+            books.append(book)
+    return books
+
+
+def legacy_sub(self: Subscriber, other: Subscriber) -> list:
+    books = []
+    for book in self._books:
+        if (
+            not any(book.book == other_book.book for other_book in other._books)
+            and len(books) < self.size
+        ):
+            books.append(book)
+    return books
+
+
+def make_cards(loans: int) -> tuple[Subscriber, Subscriber]:
+    books = [
+        Book(f"Автор{i % 97}", f"Книга{i}", 1900 + i % 120, "Издательство", 10.0 + i)
+        for i in range(loans * 3 // 2)
+    ]
+    first = Subscriber("Иванов", "LIB001", loans * 2)
+    second = Subscriber("Иванов", "LIB001", loans * 2)
+    for book in books[:loans]:
+        first.add_book(book, "2024-01-01")
+    half = loans // 2
+    for book in books[half:]:
+        second.add_book(book, "2024-01-01")
+    return first, second
+
+
+def best_of(function, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    for loans in (1_000, 5_000):
+        first, second = make_cards(loans)
+        print(f"Выдач в карточке: {loans}")
+        for name, legacy, current in (
+            ("a + b", legacy_add, lambda a, b: a + b),
+            ("a - b", legacy_sub, lambda a, b: a - b),
+        ):
+            old = best_of(lambda: legacy(first, second))
+            new = best_of(lambda: current(first, second))
+            print(f"  {name}: было {old:.4f} с, стало {new:.4f} с ({old / new:.0f}x)")
+        # Пересечение ограничено MAX_SIZE, поэтому прежняя версия сканирует всё.
+        old = best_of(lambda: legacy_and(second, first))
+        new = best_of(lambda: second & first)
+        print(f"  a & b: было {old:.4f} с, стало {new:.4f} с ({old / new:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
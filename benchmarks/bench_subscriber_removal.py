@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""remove_book, `in` и доступ по индексу на карточках разного размера.
+
+Использует только публичные методы, поэтому запускается и на прежних версиях.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tasks"))
+
+from library_package.library_model import Book, Subscriber  # noqa: E402
+
+
+def make_card(loans: int) -> tuple[Subscriber, list[Book]]:
+    books = [
+        Book(f"Автор{i % 97}", f"Книга{i}", 1900 + i % 120, "Издательство", 10.0 + i)
+        for i in range(loans)
+    ]
+    subscriber = Subscriber("Иванов", "LIB001", loans)
+    subscriber.add_books((book, "2024-01-01") for book in books)
+    return subscriber, books
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    rng = random.Random(1)
+    for loans in (Subscriber.MAX_SIZE, 10_000, 50_000):
+        subscriber, books = make_card(loans)
+        probes = [rng.choice(books) for _ in range(1_000)]
+        contains = timed(lambda: [book in subscriber for book in probes])
+        indexes = [rng.randrange(loans) for _ in range(100_000)]
+        access = timed(lambda: [subscriber[i] for i in indexes])
+        order = books[:]
+        rng.shuffle(order)
+        remove = timed(lambda: [subscriber.remove_book(book) for book in order])
+        # Чередование удаления и доступа по индексу — худший случай.
+        subscriber, books = make_card(loans)
+        mixed_count = min(loans - 1, 1_000)
+        mixed = timed(
+            lambda: [
+                (subscriber.remove_book(book), subscriber[0])
+                for book in books[-mixed_count:]
+            ]
+        )
+        print(
+            f"выдач {loans:>6}: 1000 x in {contains * 1e3:8.2f} мс, "
+            f"100000 x [i] {access * 1e3:7.2f} мс, "
+            f"удалить все {remove * 1e3:9.2f} мс, "
+            f"{mixed_count} x (удалить, [0]) {mixed * 1e3:8.2f} мс"
+        )
+
+
+if __name__ == "__main__":
+    main()
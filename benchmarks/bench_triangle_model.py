@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Память и скорость сортировки RightTrianglePair против прежней версии класса"""
+
+import random
+import sys
+import time
+import tracemalloc
+from math import sqrt
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tasks"))
+
+from triangle_model import RightTrianglePair  # noqa: E402
+
+
+class LegacyRightTrianglePair:
+    """Прежняя версия: __dict__ у каждого экземпляра, гипотенуза без кэша"""
+
+    def __init__(self, first: float = 1, second: float = 1) -> None:
+        self.first = first
+        self.second = second
+
+    @property
+    def first(self) -> float:
+        return self.__first
+
+    @first.setter
+    def first(self, value: float) -> None:
+        value = float(value)
+        if value <= 0:
+            raise ValueError("Катеты должны быть положительными числами")
+        self.__first = value
+
+    @property
+    def second(self) -> float:
+        return self.__second
+
+    @second.setter
+    def second(self, value: float) -> None:
+        value = float(value)
+        if value <= 0:
+            raise ValueError("Катеты должны быть положительными числами")
+        self.__second = value
+
+    @property
+    def hypotenuse(self) -> float:
+        return sqrt(self.first**2 + self.second**2)
+
+    def __lt__(self, other) -> bool:
+        if isinstance(other, LegacyRightTrianglePair):
+            return self.hypotenuse < other.hypotenuse
+        return False
+
+
+def bytes_per_instance(cls, legs) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [cls(a, b) for a, b in legs]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # Вычитаем сам список ссылок, чтобы остались только экземпляры.
+    return (total - sys.getsizeof(objects)) / len(objects)
+
+
+def sort_seconds(cls, legs, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        objects = [cls(a, b) for a, b in legs]
+        start = time.perf_counter()
+        objects.sort()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n: int = 200_000) -> None:
+    rng = random.Random(42)
+    legs = [(rng.uniform(0.1, 100), rng.uniform(0.1, 100)) for _ in range(n)]
+
+    print(f"n = {n}")
+    for cls in (LegacyRightTrianglePair, RightTrianglePair):
+        size = bytes_per_instance(cls, legs)
+        seconds = sort_seconds(cls, legs)
+        print(
+            f"{cls.__name__:>24}: {size:7.1f} байт/экз., "
+            f"sort {seconds:.3f} с ({n / seconds / 1e6:.2f} млн/с)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Нагрузочный клиент для library_service: задержки p50/p95/p99.
+
+Без --port поднимает сервис в этом же процессе на свободном порту.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tasks"))
+
+from library_package.library_service import LibraryService  # noqa: E402
+
+
+def make_book(i: int) -> dict:
+    return {
+        "author": f"Автор{i % 97}",
+        "title": f"Книга{i}",
+        "year": 1900 + i % 120,
+        "publisher": "Издательство",
+        "price": 10.0 + i,
+    }
+
+
+def workload(library_id: str, requests: int) -> list[dict]:
+    """Выдача, поиск, долг и возврат по кругу для одной карточки"""
+    result = []
+    for i in range(requests):
+        book = make_book(i // 4)
+        step = i % 4
+        if step == 0:
+            request = {"op": "issue", "book": book, "issue_date": "2024-01-01"}
+        elif step == 1:
+            request = {"op": "find", "by": "author", "value": book["author"]}
+        elif step == 2:
+            request = {"op": "debt"}
+        else:
+            request = {"op": "return", "book": book}
+        result.append({"library_id": library_id, **request})
+    return result
+
+
+async def client(
+    host: str, port: int, requests: list[dict], latencies: list[float]
+) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for request in requests:
+            start = time.perf_counter()
+            writer.write((json.dumps(request, ensure_ascii=False) + "\n").encode())
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            if not response["ok"]:
+                raise RuntimeError(response["error"])
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_load(
+    host: str, port: int, connections: int, requests: int
+) -> dict[str, float]:
+    ids = [f"LOAD{connections}-{i}" for i in range(connections)]
+    setup = [{"op": "register", "library_id": lid, "size": requests} for lid in ids]
+    await client(host, port, setup, [])
+
+    latencies: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(client(host, port, workload(lid, requests), latencies) for lid in ids)
+    )
+    elapsed = time.perf_counter() - start
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+    }
+
+
+async def main_async(arguments: argparse.Namespace) -> None:
+    server = None
+    port = arguments.port
+    if port is None:
+        server = await LibraryService().serve_tcp(arguments.host, 0)
+        port = server.sockets[0].getsockname()[1]
+    try:
+        for connections in itertools.takewhile(
+            lambda n: n <= arguments.connections, (1, 4, 16, 64, 256)
+        ):
+            report = await run_load(
+                arguments.host, port, connections, arguments.requests
+            )
+            print(
+                f"соединений {connections:>3}: {report['requests']} запросов, "
+                f"{report['rps']:.0f} запр/с, p50 {report['p50']:.2f} мс, "
+                f"p95 {report['p95']:.2f} мс, p99 {report['p99']:.2f} мс"
+            )
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=400)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
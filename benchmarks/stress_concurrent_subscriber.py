@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Нагрузка на карточки из многих потоков: проверка инвариантов и пропускная
+способность для Subscriber и ConcurrentSubscriber.
+
+Частое переключение потоков (sys.setswitchinterval) делает гонки в обычном
+Subscriber заметными даже при GIL.
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tasks"))
+
+from library_package.concurrent_subscriber import (  # noqa: E402
+    ConcurrentSubscriber,
+    LockStripes,
+    transfer_book,
+)
+from library_package.library_model import Book, Subscriber  # noqa: E402
+
+BOOKS = [
+    Book(f"Автор{i % 13}", f"Книга{i}", 1900 + i % 50, f"Изд{i % 5}", 10.0 + i)
+    for i in range(500)
+]
+
+
+def violations(card: Subscriber) -> list[str]:
+    found = []
+    if card.count != len(card._books):
+        found.append(f"count={card.count}, выдач={len(card._books)}")
+    if card.count > card.size:
+        found.append(f"превышен лимит: {card.count}/{card.size}")
+    indexed = sum(len(bucket) for bucket in card._by_author.values())
+    if indexed != len(card._books):
+        found.append(f"в индексе {indexed} выдач из {len(card._books)}")
+    return found
+
+
+def writer(cards, operations: int, seed: int, errors: list, concurrent: bool) -> None:
+    rng = random.Random(seed)
+    for _ in range(operations):
+        card = rng.choice(cards)
+        action = rng.random()
+        try:
+            if action < 0.55:
+                card.add_book(rng.choice(BOOKS), "2024-01-01")
+            elif action < 0.9 or not concurrent:
+                card.remove_book(rng.choice(card._books or [None]).book)
+            else:
+                transfer_book(card, rng.choice(cards), rng.choice(card._books).book)
+        except (ValueError, AttributeError, IndexError):
+            pass  # лимит, пустая карточка или книгу уже забрали
+        except Exception as error:  # noqa: BLE001
+            errors.append(repr(error))
+
+
+def reader(cards, stop: threading.Event, errors: list, counter: list) -> None:
+    rng = random.Random()
+    reads = 0
+    while not stop.is_set():
+        card = rng.choice(cards)
+        try:
+            card.find_by_author(f"Автор{rng.randrange(13)}")
+            card.find_by_year(1900 + rng.randrange(50))
+            sum(loan.book.price for loan in card._books)
+        except Exception as error:  # noqa: BLE001
+            errors.append(repr(error))
+        reads += 1
+    counter.append(reads)
+
+
+def run(concurrent: bool, writers: int, readers: int, operations: int) -> None:
+    stripes = LockStripes(16)
+    size = 40
+    if concurrent:
+        cards = [ConcurrentSubscriber("", f"LIB{i}", size, stripes) for i in range(8)]
+    else:
+        cards = [Subscriber("", f"LIB{i}", size) for i in range(8)]
+    errors: list[str] = []
+    reads: list[int] = []
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=writer, args=(cards, operations, i, errors, concurrent))
+        for i in range(writers)
+    ]
+    reader_threads = [
+        threading.Thread(target=reader, args=(cards, stop, errors, reads))
+        for _ in range(readers)
+    ]
+    start = time.perf_counter()
+    for thread in threads + reader_threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in reader_threads:
+        thread.join()
+
+    broken = [f"{card.library_id}: {v}" for card in cards for v in violations(card)]
+    name = ConcurrentSubscriber.__name__ if concurrent else Subscriber.__name__
+    print(
+        f"{name}: {writers} писателей и {readers} читателей, "
+        f"{writers * operations / elapsed:.0f} изменений/с, "
+        f"{sum(reads) / elapsed:.0f} чтений/с"
+    )
+    print(f"  нарушений инвариантов: {len(broken)}, исключений: {len(errors)}")
+    for line in (broken + errors)[:5]:
+        print(f"    {line}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--operations", type=int, default=5_000)
+    parser.add_argument("--switch-interval", type=float, default=1e-6)
+    arguments = parser.parse_args()
+    sys.setswitchinterval(arguments.switch_interval)
+    for concurrent in (False, True):
+        run(concurrent, arguments.writers, arguments.readers, arguments.operations)
+
+
+if __name__ == "__main__":
+    main()
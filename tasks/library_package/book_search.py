@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+from bisect import bisect_left, insort
+from heapq import nlargest
+from itertools import islice
+from math import log
+from typing import Iterator, NamedTuple
+
+from .library_model import Book, BorrowedBook, Subscriber, _book_key
+
+_TOKEN = re.compile(r"\w+")
+
+# Совпадение в названии важнее, чем в авторе, а в авторе — чем в издательстве.
+TITLE_WEIGHT = 3
+AUTHOR_WEIGHT = 2
+PUBLISHER_WEIGHT = 1
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.casefold())
+
+
+class SearchHit(NamedTuple):
+    book: Book
+    score: float
+
+
+class BookSearchIndex:
+    """Инвертированный индекс по названию, автору и издательству книг.
+
+    Словарь токенов хранится отсортированным: префикс — это непрерывный
+    отрезок, который находится двоичным поиском.
+    """
+
+    def __init__(self, max_expansions: int = 64) -> None:
+        if max_expansions <= 0:
+            raise ValueError("Число расширений префикса должно быть положительным")
+        self.max_expansions = max_expansions
+        self._doc_ids: dict[tuple, int] = {}
+        self._books: dict[int, Book] = {}
+        self._refs: dict[int, int] = {}
+        self._next_id = 0
+        # Токен -> {вес совпадения: {номер книги: None}}; внутри корзины книги
+        # идут по возрастанию номера, поэтому лучшие находятся без полного обхода.
+        self._postings: dict[str, dict[int, dict[int, None]]] = {}
+        # Номер книги -> {токен: вес}: проверка слова запроса без обхода словаря.
+        self._tokens: dict[int, dict[str, int]] = {}
+        self._df: dict[str, int] = {}
+        self._vocabulary: list[str] = []
+        # Ключи книг выдач; одна выдача может стоять в карточке дважды.
+        self._loan_keys: dict[tuple[int, int], list[tuple]] = {}
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def __contains__(self, book: Book) -> bool:
+        return isinstance(book, Book) and _book_key(book) in self._doc_ids
+
+    def add(self, book: Book) -> None:
+        """Добавляет книгу; повторное добавление увеличивает счётчик ссылок"""
+        self._acquire(_book_key(book), book)
+
+    def discard(self, book: Book) -> None:
+        self._release(_book_key(book))
+
+    def _acquire(self, key: tuple, book: Book) -> None:
+        doc = self._doc_ids.get(key)
+        if doc is not None:
+            self._refs[doc] += 1
+            return
+        doc = self._next_id
+        self._next_id += 1
+        self._doc_ids[key] = doc
+        self._books[doc] = book
+        self._refs[doc] = 1
+        weights = self._tokens[doc] = self._weights(key)
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._df[token] = 0
+                insort(self._vocabulary, token)
+            postings.setdefault(weight, {})[doc] = None
+            self._df[token] += 1
+
+    def _release(self, key: tuple) -> None:
+        doc = self._doc_ids.get(key)
+        if doc is None:
+            raise ValueError("Книга не найдена в индексе")
+        self._refs[doc] -= 1
+        if self._refs[doc]:
+            return
+        del self._refs[doc], self._books[doc], self._doc_ids[key]
+        for token, weight in self._tokens.pop(doc).items():
+            postings = self._postings[token]
+            docs = postings[weight]
+            del docs[doc]
+            if not docs:
+                del postings[weight]
+            self._df[token] -= 1
+            if not self._df[token]:
+                del self._postings[token], self._df[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    @staticmethod
+    def _weights(key: tuple) -> dict[str, int]:
+        author, title, _, publisher, _ = key
+        weights: dict[str, int] = {}
+        for text, weight in (
+            (title, TITLE_WEIGHT),
+            (author, AUTHOR_WEIGHT),
+            (publisher, PUBLISHER_WEIGHT),
+        ):
+            for token in tokenize(text):
+                weights[token] = weights.get(token, 0) + weight
+        return weights
+
+    def _expand(self, term: str, prefix: bool, limit: int | None = None) -> list[str]:
+        """Токены слова запроса; limit ограничивает число токенов префикса"""
+        if not prefix:
+            return [term] if term in self._postings else []
+        vocabulary = self._vocabulary
+        start = bisect_left(vocabulary, term)
+        stop = bisect_left(vocabulary, term + "\U0010ffff", start)
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return vocabulary[start:stop]
+
+    @staticmethod
+    def _best_docs(postings: dict[int, dict[int, None]]) -> Iterator[int]:
+        for weight in sorted(postings, reverse=True):
+            yield from postings[weight]
+
+    def search(
+        self, query: str, limit: int = 10, prefix: bool = True
+    ) -> list[SearchHit]:
+        """Книги, содержащие все слова запроса, по убыванию релевантности.
+
+        Последнее слово при prefix=True считается началом слова.
+        """
+        terms = tokenize(query)
+        if not terms or limit <= 0:
+            return []
+        total = len(self._books)
+        groups = []
+        # Префикс урезается только в запросе из одного слова: там его токены
+        # порождают кандидатов. Иначе префикс проверяется по всему отрезку.
+        expansions = self.max_expansions if len(terms) == 1 else None
+        groups = []
+        for i, term in enumerate(terms):
+            tokens = self._expand(term, prefix and i == len(terms) - 1, expansions)
+            if not tokens:
+                return []
+            size = sum(self._df[t] for t in tokens)
+            idfs = {t: log(1 + total / self._df[t]) for t in tokens}
+            groups.append((size, idfs))
+        groups.sort(key=lambda group: group[0])
+        groups = [idfs for _, idfs in groups]
+        if len(groups) == 1:
+            # Лучшие limit книг — среди лучших limit книг каждого из слов.
+            candidates = {
+                doc
+                for token in groups[0]
+                for doc in islice(self._best_docs(self._postings[token]), limit)
+            }
+        else:
+            # Кандидаты берутся из самого редкого слова, остальные только проверяются.
+            candidates = {
+                doc
+                for token in groups[0]
+                for docs in self._postings[token].values()
+                for doc in docs
+            }
+        scores: dict[int, float] = {}
+        for doc in candidates:
+            weights = self._tokens[doc]
+            score = 0.0
+            for idfs in groups:
+                best = max(
+                    (w * idfs[t] for t, w in weights.items() if t in idfs), default=0.0
+                )
+                if not best:
+                    break
+                score += best
+            else:
+                scores[doc] = score
+        # При равной релевантности раньше идёт книга, добавленная раньше.
+        top = nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [SearchHit(self._books[doc], score) for doc, score in top]
+
+    def complete(self, prefix: str, limit: int = 10) -> list[str]:
+        """Слова, начинающиеся с prefix, по числу книг, в которых они есть"""
+        prefix = prefix.casefold()
+        if not prefix or limit <= 0:
+            return []
+        vocabulary = self._vocabulary
+        start = bisect_left(vocabulary, prefix)
+        stop = bisect_left(vocabulary, prefix + "\U0010ffff", start)
+        return nlargest(
+            limit,
+            vocabulary[start:stop],
+            key=self._df.__getitem__,
+        )
+
+    def track(self, subscriber: Subscriber) -> None:
+        subscriber._attach_observer(self)
+        for borrowed_book in subscriber._books:
+            self._loan_added(subscriber, borrowed_book)
+
+    def untrack(self, subscriber: Subscriber) -> None:
+        subscriber._detach_observer(self)
+        for borrowed_book in subscriber._books:
+            self._loan_removed(subscriber, borrowed_book)
+
+    # Вызываются абонентами при выдаче и возврате книг.
+    def _loan_added(self, subscriber: Subscriber, borrowed_book: BorrowedBook) -> None:
+        key = _book_key(borrowed_book.book)
+        self._loan_keys.setdefault((id(subscriber), id(borrowed_book)), []).append(key)
+        self._acquire(key, borrowed_book.book)
+
+    def _loan_removed(
+        self, subscriber: Subscriber, borrowed_book: BorrowedBook
+    ) -> None:
+        loan = (id(subscriber), id(borrowed_book))
+        keys = self._loan_keys[loan]
+        key = keys.pop()
+        if not keys:
+            del self._loan_keys[loan]
+        self._release(key)
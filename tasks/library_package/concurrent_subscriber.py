@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from contextlib import ExitStack, contextmanager
+from typing import Iterable, Iterator
+from zlib import crc32
+
+from .library_model import Book, BorrowedBook, Subscriber, _book_key, _day_parser
+
+
+class LockStripes:
+    """Фиксированный набор блокировок, разделяемый многими карточками"""
+
+    def __init__(self, count: int = 64) -> None:
+        if count <= 0:
+            raise ValueError("Количество блокировок должно быть положительным")
+        # RLock: операция над несколькими карточками вызывает методы карточек,
+        # которые снова берут свою полосу.
+        self._locks = [threading.RLock() for _ in range(count)]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def stripe_of(self, library_id: str) -> int:
+        return crc32(library_id.encode("utf-8")) % len(self._locks)
+
+    def __getitem__(self, stripe: int) -> threading.RLock:
+        return self._locks[stripe]
+
+    @contextmanager
+    def holding(self, stripes: Iterable[int]) -> Iterator[None]:
+        """Захватывает полосы по возрастанию номера, поэтому без взаимоблокировок"""
+        with ExitStack() as stack:
+            for stripe in sorted(set(stripes)):
+                stack.enter_context(self._locks[stripe])
+            yield
+
+
+DEFAULT_STRIPES = LockStripes()
+
+
+class ConcurrentSubscriber(Subscriber):
+    """Потокобезопасная карточка абонента.
+
+    Изменения идут под блокировкой полосы карточки и публикуют новые копии
+    словаря выдач и корзин индексов; чтение берёт опубликованную копию без
+    блокировок. Наблюдатели, общие для разных карточек, синхронизируются сами.
+    """
+
+    def __init__(
+        self,
+        name: str = "",
+        library_id: str = "",
+        size: int = Subscriber.MAX_SIZE,
+        stripes: LockStripes | None = None,
+    ) -> None:
+        super().__init__(name, library_id, size)
+        self._stripes = stripes if stripes is not None else DEFAULT_STRIPES
+        # Полоса фиксируется при создании, даже если номер потом изменят.
+        self._stripe = self._stripes.stripe_of(library_id)
+        self._lock = self._stripes[self._stripe]
+        self._debts._lock = self._lock
+        # Позиции берутся только из _snapshot, базовый кэш не используется.
+        self._positions = None
+        self._snapshot: tuple | None = None
+
+    def _order(self) -> tuple[list[int], list[BorrowedBook]]:
+        # Позиции привязаны к конкретной копии словаря, поэтому читатель,
+        # опоздавший к публикации, не подменит их устаревшими.
+        loans = self._loans
+        snapshot = self._snapshot
+        if snapshot is None or snapshot[0] is not loans:
+            snapshot = self._snapshot = (loans, list(loans), list(loans.values()))
+        return snapshot[1], snapshot[2]
+
+    def __setitem__(self, index: int, value: BorrowedBook) -> None:
+        with self._lock:
+            seqs, books = self._order()
+            if not 0 <= index < len(books):
+                raise IndexError("Индекс вне диапазона")
+            previous = books[index]
+            seq = seqs[index]
+            self._loans = {**self._loans, seq: value}
+            self._unindex(seq)
+            self._index(seq, value)
+            self._notify("_loan_removed", previous)
+            self._notify("_loan_added", value)
+
+    def add_book(self, book: Book, issue_date: str = "") -> None:
+        borrowed_book = BorrowedBook(book, issue_date)
+        with self._lock:
+            if self.count >= self.size:
+                raise ValueError(f"Достигнут лимит книг: {self.size}")
+            self._append(borrowed_book)
+
+    def add_books(self, items: Iterable[tuple[Book, str]]) -> None:
+        parse = _day_parser()
+        with self._lock:
+            for book, issue_date in items:
+                if self.count >= self.size:
+                    raise ValueError(f"Достигнут лимит книг: {self.size}")
+                self._append(BorrowedBook._from_day(book, parse(issue_date)))
+
+    def _append(self, borrowed_book: BorrowedBook) -> None:
+        seq = self._next_seq
+        self._next_seq += 1
+        self._index(seq, borrowed_book)
+        self._loans = {**self._loans, seq: borrowed_book}
+        self.count += 1
+        self._notify("_loan_added", borrowed_book)
+
+    def remove_book(self, book: Book) -> None:
+        with self._lock:
+            seq = self._first_seq(book)
+            loans = dict(self._loans)
+            borrowed_book = loans.pop(seq)
+            self._loans = loans
+            self._unindex(seq)
+            self.count -= 1
+            self._notify("_loan_removed", borrowed_book)
+
+    def _index(self, seq: int, borrowed_book: BorrowedBook) -> None:
+        book = borrowed_book.book
+        keys = (book.author.lower(), book.publisher.lower(), book.year, _book_key(book))
+        self._index_keys[seq] = keys
+        for index, key in zip(self._indexes(), keys):
+            previous = index.get(key, {})
+            bucket = {**previous, seq: borrowed_book}
+            if previous and next(reversed(previous)) > seq:
+                bucket = dict(sorted(bucket.items()))
+            index[key] = bucket
+        self._debts.add(seq, borrowed_book)
+
+    def _unindex(self, seq: int) -> None:
+        for index, key in zip(self._indexes(), self._index_keys.pop(seq)):
+            bucket = {s: b for s, b in index[key].items() if s != seq}
+            if bucket:
+                index[key] = bucket
+            else:
+                del index[key]
+        self._debts.discard(seq)
+
+
+def transfer_book(
+    source: ConcurrentSubscriber, target: ConcurrentSubscriber, book: Book
+) -> None:
+    """Переносит выдачу книги на другую карточку атомарно для обеих"""
+    if source._stripes is not target._stripes:
+        raise ValueError("Карточки используют разные наборы блокировок")
+    with source._stripes.holding((source._stripe, target._stripe)):
+        borrowed_book = source._loans[source._first_seq(book)]
+        if target.count >= target.size:
+            raise ValueError(f"Достигнут лимит книг: {target.size}")
+        source.remove_book(book)
+        target._append(borrowed_book)
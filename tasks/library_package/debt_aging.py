@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from datetime import date
+from typing import Iterable, NamedTuple, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .library_ledger import _EPOCH
+from .library_model import Subscriber, _as_of_day
+
+# Верхние границы корзин в днях просрочки: 1–30, 31–60 и больше 60 дней.
+DEFAULT_EDGES = (30, 60)
+
+# Для невозвращённых выдач: день возврата позже любой даты.
+_NOT_RETURNED = np.iinfo(np.int64).max
+
+
+class AgingReport(NamedTuple):
+    as_of: date
+    labels: tuple[str, ...]
+    library_ids: list[str]
+    # Строка — абонент, столбец — корзина.
+    counts: np.ndarray
+    costs: np.ndarray
+
+    def totals(self) -> tuple[np.ndarray, np.ndarray]:
+        """Число и стоимость просроченных выдач по корзинам для всех абонентов"""
+        return self.counts.sum(axis=0), self.costs.sum(axis=0)
+
+
+class DebtAging:
+    """Выдачи многих абонентов в столбцах numpy.
+
+    Столбцы собираются один раз, после чего просрочка на любую дату
+    считается одним векторным проходом без обхода объектов.
+    """
+
+    def __init__(
+        self,
+        library_ids: list[str],
+        owners: np.ndarray,
+        return_days: np.ndarray,
+        prices: np.ndarray,
+        returned: np.ndarray,
+        returned_days: np.ndarray,
+        edges: Sequence[int] = DEFAULT_EDGES,
+    ) -> None:
+        """returned_days — дни возврата; 0 — книга возвращена в неизвестный день"""
+        if any(edge <= 0 for edge in edges) or any(
+            left >= right for left, right in zip(edges, edges[1:])
+        ):
+            raise ValueError("Границы корзин должны быть положительными и возрастать")
+        if not (
+            len(owners)
+            == len(return_days)
+            == len(prices)
+            == len(returned)
+            == len(returned_days)
+        ):
+            raise ValueError("Столбцы выдач должны быть одной длины")
+        self.library_ids = library_ids
+        self.edges = np.asarray(edges, dtype=np.int64)
+        self._owners = np.asarray(owners, dtype=np.int64)
+        self._return_days = np.asarray(return_days, dtype=np.int64)
+        self._prices = np.asarray(prices, dtype=np.float64)
+        self._returned_days = np.where(
+            np.asarray(returned, dtype=bool),
+            np.asarray(returned_days, dtype=np.int64),
+            _NOT_RETURNED,
+        )
+
+    @classmethod
+    def from_subscribers(
+        cls, subscribers: Iterable[Subscriber], edges: Sequence[int] = DEFAULT_EDGES
+    ) -> "DebtAging":
+        library_ids: list[str] = []
+        sizes: list[int] = []
+        return_days: list[int] = []
+        prices: list[float] = []
+        returned: list[bool] = []
+        returned_days: list[int] = []
+        for subscriber in subscribers:
+            books = subscriber._books
+            library_ids.append(subscriber.library_id)
+            sizes.append(len(books))
+            for borrowed_book in books:
+                return_days.append(borrowed_book._return_day)
+                prices.append(borrowed_book.book.price)
+                returned.append(borrowed_book.returned)
+                returned_days.append(borrowed_book._returned_day or 0)
+        owners = np.repeat(np.arange(len(sizes)), sizes)
+        return cls(
+            library_ids, owners, return_days, prices, returned, returned_days, edges
+        )
+
+    @classmethod
+    def from_ledger(
+        cls, ledger: pa.Table, edges: Sequence[int] = DEFAULT_EDGES
+    ) -> "DebtAging":
+        """Столбцы из таблицы ledger_table; абоненты без выдач в неё не попадают"""
+        encoded = ledger.column("library_id").combine_chunks().dictionary_encode()
+        return_days = ledger.column("return_date").cast(pa.int32()).to_numpy()
+        returned_days = pc.fill_null(
+            ledger.column("returned_date").cast(pa.int32()), -_EPOCH
+        ).to_numpy()
+        return cls(
+            encoded.dictionary.to_pylist(),
+            encoded.indices.to_numpy(),
+            return_days.astype(np.int64) + _EPOCH,
+            ledger.column("price").to_numpy(),
+            ledger.column("returned").to_numpy(),
+            returned_days.astype(np.int64) + _EPOCH,
+            edges,
+        )
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    @property
+    def labels(self) -> tuple[str, ...]:
+        bounds = [0, *self.edges.tolist()]
+        return (
+            *(f"{left}-{right}" for left, right in zip(bounds, bounds[1:])),
+            f"{bounds[-1]}+",
+        )
+
+    def overdue_days(self, as_of: str | date | None = None) -> np.ndarray:
+        """Дни просрочки каждой выдачи на as_of; 0 — выдача не просрочена"""
+        return self._overdue_days(_as_of_day(as_of))
+
+    def _overdue_days(self, day: int) -> np.ndarray:
+        days = day - self._return_days
+        # Как BorrowedBook._is_overdue_on: на этот день книгу ещё не вернули.
+        days[self._returned_days <= day] = 0
+        return np.maximum(days, 0, out=days)
+
+    def report(self, as_of: str | date | None = None) -> AgingReport:
+        day = _as_of_day(as_of)
+        days = self._overdue_days(day)
+        overdue = days > 0
+        buckets = np.searchsorted(self.edges, days[overdue])
+        width = len(self.edges) + 1
+        cells = self._owners[overdue] * width + buckets
+        size = len(self.library_ids) * width
+        counts = np.bincount(cells, minlength=size).reshape(-1, width)
+        costs = np.bincount(
+            cells, weights=self._prices[overdue], minlength=size
+        ).reshape(-1, width)
+        return AgingReport(
+            date.fromordinal(day), self.labels, self.library_ids, counts, costs
+        )
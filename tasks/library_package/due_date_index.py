@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left, insort
+from datetime import date
+
+from .library_model import BorrowedBook, Subscriber, _as_of_day
+
+Entry = tuple[Subscriber, BorrowedBook]
+
+
+class DueDateIndex:
+    """Календарь сроков возврата по всем отслеживаемым абонентам"""
+
+    def __init__(self) -> None:
+        # Корзины по порядковому номеру дня срока возврата. Одна выдача может
+        # стоять в карточке дважды, поэтому под ключом лежит список записей.
+        self._buckets: dict[int, dict[tuple[int, int], list[Entry]]] = {}
+        self._days: list[int] = []
+        self._holders: dict[int, list[Subscriber]] = {}
+
+    def track(self, subscriber: Subscriber) -> None:
+        subscriber._attach_observer(self)
+        for borrowed_book in subscriber._books:
+            self._loan_added(subscriber, borrowed_book)
+
+    def untrack(self, subscriber: Subscriber) -> None:
+        subscriber._detach_observer(self)
+        for borrowed_book in subscriber._books:
+            self._loan_removed(subscriber, borrowed_book)
+
+    def overdue(self, as_of: str | date | None = None) -> list[Entry]:
+        """Невозвращённые выдачи со сроком раньше as_of (по умолчанию — сегодня)"""
+        day = _as_of_day(as_of)
+        result: list[Entry] = []
+        for return_day in self._days:
+            if return_day >= day:
+                break
+            for entries in self._buckets[return_day].values():
+                result.extend(entries)
+        return result
+
+    def __len__(self) -> int:
+        return sum(
+            len(entries)
+            for bucket in self._buckets.values()
+            for entries in bucket.values()
+        )
+
+    def _add_entry(self, subscriber: Subscriber, borrowed_book: BorrowedBook) -> None:
+        return_day = borrowed_book._return_day
+        bucket = self._buckets.get(return_day)
+        if bucket is None:
+            bucket = self._buckets[return_day] = {}
+            insort(self._days, return_day)
+        bucket.setdefault((id(subscriber), id(borrowed_book)), []).append(
+            (subscriber, borrowed_book)
+        )
+
+    def _drop_entry(
+        self,
+        subscriber: Subscriber,
+        borrowed_book: BorrowedBook,
+        return_day: int | None = None,
+    ) -> None:
+        if return_day is None:
+            return_day = borrowed_book._return_day
+        bucket = self._buckets.get(return_day)
+        if bucket is None:
+            return
+        key = (id(subscriber), id(borrowed_book))
+        entries = bucket.get(key)
+        if entries is None:
+            return
+        entries.pop()
+        if not entries:
+            del bucket[key]
+        if not bucket:
+            del self._buckets[return_day]
+            del self._days[bisect_left(self._days, return_day)]
+
+    # Вызываются абонентами и выдачами при изменениях.
+    def _loan_added(self, subscriber: Subscriber, borrowed_book: BorrowedBook) -> None:
+        holders = self._holders.setdefault(id(borrowed_book), [])
+        if not holders:
+            borrowed_book._attach_observer(self)
+        holders.append(subscriber)
+        if not borrowed_book.returned:
+            self._add_entry(subscriber, borrowed_book)
+
+    def _loan_removed(
+        self, subscriber: Subscriber, borrowed_book: BorrowedBook
+    ) -> None:
+        self._drop_entry(subscriber, borrowed_book)
+        holders = self._holders[id(borrowed_book)]
+        holders.remove(subscriber)
+        if not holders:
+            del self._holders[id(borrowed_book)]
+            borrowed_book._detach_observer(self)
+
+    def _loan_returned(self, borrowed_book: BorrowedBook) -> None:
+        for subscriber in self._holders.get(id(borrowed_book), ()):
+            self._drop_entry(subscriber, borrowed_book)
+
+    def _due_changed(self, borrowed_book: BorrowedBook, previous_day: int) -> None:
+        if borrowed_book.returned:
+            return
+        for subscriber in self._holders.get(id(borrowed_book), ()):
+            self._drop_entry(subscriber, borrowed_book, previous_day)
+            self._add_entry(subscriber, borrowed_book)
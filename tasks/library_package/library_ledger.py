@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from datetime import date
+from typing import Iterable, Iterator
+
+import pandas as pd
+import pyarrow as pa
+
+from .library_model import Book, BorrowedBook, Subscriber
+
+DEFAULT_BATCH_SIZE = 65_536
+
+LEDGER_SCHEMA = pa.schema(
+    [
+        ("library_id", pa.string()),
+        ("subscriber", pa.string()),
+        ("author", pa.string()),
+        ("title", pa.string()),
+        ("year", pa.int64()),
+        ("publisher", pa.string()),
+        ("price", pa.float64()),
+        ("issue_date", pa.date32()),
+        ("return_date", pa.date32()),
+        ("returned", pa.bool_()),
+        # Пусто, если книга не возвращена или день возврата неизвестен.
+        ("returned_date", pa.date32()),
+    ]
+)
+
+# date32 хранит дни от 1970-01-01, модель — порядковые номера дней.
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def _batch(columns: dict[str, list]) -> pa.RecordBatch:
+    return pa.RecordBatch.from_arrays(
+        [pa.array(columns[field.name], field.type) for field in LEDGER_SCHEMA],
+        schema=LEDGER_SCHEMA,
+    )
+
+
+def iter_ledger_batches(
+    subscribers: Iterable[Subscriber], batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[pa.RecordBatch]:
+    """Выдачи абонентов в виде пакетов Arrow не длиннее batch_size строк"""
+    if batch_size <= 0:
+        raise ValueError("Размер пакета должен быть положительным")
+    columns: dict[str, list] = {name: [] for name in LEDGER_SCHEMA.names}
+    rows = 0
+    for subscriber in subscribers:
+        for borrowed_book in subscriber._books:
+            book = borrowed_book.book
+            columns["library_id"].append(subscriber.library_id)
+            columns["subscriber"].append(subscriber.name)
+            columns["author"].append(book.author)
+            columns["title"].append(book.title)
+            columns["year"].append(book.year)
+            columns["publisher"].append(book.publisher)
+            columns["price"].append(book.price)
+            columns["issue_date"].append(borrowed_book._issue_day - _EPOCH)
+            columns["return_date"].append(borrowed_book._return_day - _EPOCH)
+            columns["returned"].append(borrowed_book.returned)
+            columns["returned_date"].append(
+                None
+                if borrowed_book._returned_day is None
+                else borrowed_book._returned_day - _EPOCH
+            )
+            rows += 1
+            if rows == batch_size:
+                yield _batch(columns)
+                columns = {name: [] for name in LEDGER_SCHEMA.names}
+                rows = 0
+    if rows:
+        yield _batch(columns)
+
+
+def ledger_table(
+    subscribers: Iterable[Subscriber], batch_size: int = DEFAULT_BATCH_SIZE
+) -> pa.Table:
+    return pa.Table.from_batches(
+        list(iter_ledger_batches(subscribers, batch_size)), schema=LEDGER_SCHEMA
+    )
+
+
+def ledger_frame(
+    subscribers: Iterable[Subscriber], batch_size: int = DEFAULT_BATCH_SIZE
+) -> pd.DataFrame:
+    """То же, что ledger_table, но DataFrame с датами datetime64"""
+    return ledger_table(subscribers, batch_size).to_pandas(date_as_object=False)
+
+
+def subscribers_from_ledger(
+    ledger: pa.Table | pd.DataFrame, size: int = Subscriber.MAX_SIZE
+) -> list[Subscriber]:
+    """Обратный импорт: карточки в порядке первого появления номера"""
+    if isinstance(ledger, pd.DataFrame):
+        ledger = pa.Table.from_pandas(ledger, preserve_index=False)
+    columns = {
+        name: ledger.column(name).to_pylist()
+        for name in ("library_id", "subscriber", "author", "title")
+        + ("year", "publisher", "price", "returned")
+    }
+    for name in ("issue_date", "return_date", "returned_date"):
+        days = ledger.column(name).cast(pa.date32()).cast(pa.int32())
+        columns[name] = [
+            None if day is None else day + _EPOCH for day in days.to_pylist()
+        ]
+
+    subscribers: dict[str, Subscriber] = {}
+    books: dict[tuple, Book] = {}
+    for row in zip(*(columns[name] for name in LEDGER_SCHEMA.names)):
+        library_id, name, *fields, issue_day, return_day, returned, returned_day = row
+        subscriber = subscribers.get(library_id)
+        if subscriber is None:
+            subscriber = subscribers[library_id] = Subscriber(name, library_id, size)
+        key = tuple(fields)
+        book = books.get(key)
+        if book is None:
+            book = books[key] = Book(*fields)
+        borrowed_book = BorrowedBook._from_day(book, issue_day)
+        borrowed_book._return_day = return_day
+        borrowed_book._returned = returned
+        borrowed_book._returned_day = returned_day
+        subscriber._append(borrowed_book)
+    for subscriber in subscribers.values():
+        subscriber.size = max(subscriber.size, subscriber.count)
+    return list(subscribers.values())
@@ -1,10 +1,83 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from datetime import datetime, timedelta
+import sys
+import weakref
+from contextlib import nullcontext
+from datetime import date, datetime
+from fractions import Fraction
+from heapq import heapify, heappop, heappush
+from math import fsum
+from typing import Callable, Iterable, Iterator, TextIO
+
+
+def _intern(value: str) -> str:
+    return sys.intern(value) if type(value) is str else value
+
+
+def _parse_date(value: str) -> int:
+    return datetime.strptime(value, "%Y-%m-%d").toordinal()
+
+
+def _format_date(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _as_of_day(as_of: "str | date | None") -> int:
+    """Порядковый номер дня, на который считается просрочка (по умолчанию — сегодня)"""
+    if as_of is None:
+        return date.today().toordinal()
+    if isinstance(as_of, str):
+        return _parse_date(as_of)
+    return as_of.toordinal()
+
+
+def _book_lines(
+    books: list["BorrowedBook"],
+    offset: int,
+    limit: int | None,
+    today: int,
+    as_of: int | None = None,
+) -> Iterator[str]:
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("Смещение и лимит не могут быть отрицательными")
+    stop = None if limit is None else offset + limit
+    for i, book in enumerate(books[offset:stop], offset + 1):
+        yield f"  {i}. {book._render(today, as_of)}"
+
+
+def _write_lines(stream: TextIO, lines: Iterable[str]) -> None:
+    # Строки разделяются переводом строки, в конце его нет — как в __str__.
+    separator = ""
+    for line in lines:
+        stream.write(separator)
+        stream.write(line)
+        separator = "\n"
+
+
+def _book_key(book: "Book") -> tuple:
+    # Снимок полей: ключ не ломается, если книгу потом изменят через ссылку.
+    return (book.author, book.title, book.year, book.publisher, book.price)
+
+
+def _day_parser() -> Callable[[str], int]:
+    """Разбор дат с кэшем: каждая различная строка разбирается один раз"""
+    days: dict[str, int] = {}
+
+    def parse(value: str) -> int:
+        day = days.get(value)
+        if day is None:
+            day = days[value] = (
+                _parse_date(value) if value else date.today().toordinal()
+            )
+        return day
+
+    return parse
 
 
 class Book:
+    __slots__ = ("author", "title", "year", "publisher", "price", "_hash")
+
     def __init__(
         self,
         author: str = "",
@@ -18,12 +91,18 @@ class Book:
         if price < 0:
             raise ValueError("Цена не может быть отрицательной")
 
-        self.author: str = author
+        # Авторы и издательства повторяются: храним одну копию каждой строки.
+        self.author: str = _intern(author)
         self.title: str = title
         self.year: int = year
-        self.publisher: str = publisher
+        self.publisher: str = _intern(publisher)
         self.price: float = price
 
+    def __setattr__(self, name: str, value) -> None:
+        object.__setattr__(self, name, value)
+        if name != "_hash":
+            object.__setattr__(self, "_hash", None)
+
     def __str__(self) -> str:
         return f"'{self.title}' by {self.author} ({self.year})"
 
@@ -39,41 +118,289 @@ class Book:
         return False
 
     def __hash__(self) -> int:
-        return hash((self.author, self.title, self.year, self.publisher, self.price))
+        if self._hash is None:
+            self._hash = hash(
+                (self.author, self.title, self.year, self.publisher, self.price)
+            )
+        return self._hash
 
 
 class BorrowedBook:
     MAX_DAYS = 30
 
+    # Даты хранятся как порядковые номера дней (date.toordinal).
+    __slots__ = (
+        "book",
+        "_issue_day",
+        "_return_day",
+        "_returned",
+        "_returned_day",
+        "_observers",
+    )
+
     def __init__(self, book: Book, issue_date: str = "") -> None:
         self.book: Book = book
-        self.issue_date: str = issue_date or datetime.now().strftime("%Y-%m-%d")
-        self.return_date: str = self._calculate_return_date()
-        self.returned: bool = False
+        self._issue_day: int = (
+            _parse_date(issue_date) if issue_date else date.today().toordinal()
+        )
+        self._return_day: int = self._issue_day + self.MAX_DAYS
+        self._returned: bool = False
+        # День возврата; None — не возвращена или день неизвестен.
+        self._returned_day: int | None = None
+        self._observers: list | None = None
+
+    @property
+    def returned(self) -> bool:
+        return self._returned
+
+    @returned.setter
+    def returned(self, value: bool) -> None:
+        # Возврат идёт через mark_returned, иначе наблюдатели о нём не узнают.
+        if value:
+            self.mark_returned()
+        elif self._returned:
+            raise ValueError("Возврат книги нельзя отменить")
+
+    @property
+    def issue_date(self) -> str:
+        return _format_date(self._issue_day)
+
+    @issue_date.setter
+    def issue_date(self, value: str) -> None:
+        self._issue_day = _parse_date(value)
+
+    @property
+    def return_date(self) -> str:
+        return _format_date(self._return_day)
+
+    @return_date.setter
+    def return_date(self, value: str) -> None:
+        previous_day = self._return_day
+        self._return_day = _parse_date(value)
+        if self._observers and previous_day != self._return_day:
+            for observer in list(self._observers):
+                observer._due_changed(self, previous_day)
 
     def _calculate_return_date(self) -> str:
-        issue_dt = datetime.strptime(self.issue_date, "%Y-%m-%d")
-        return_dt = issue_dt + timedelta(days=self.MAX_DAYS)
-        return return_dt.strftime("%Y-%m-%d")
+        return _format_date(self._issue_day + self.MAX_DAYS)
+
+    @classmethod
+    def _from_day(cls, book: Book, issue_day: int) -> "BorrowedBook":
+        borrowed_book = cls.__new__(cls)
+        borrowed_book.book = book
+        borrowed_book._issue_day = issue_day
+        borrowed_book._return_day = issue_day + cls.MAX_DAYS
+        borrowed_book._returned = False
+        borrowed_book._returned_day = None
+        borrowed_book._observers = None
+        return borrowed_book
+
+    @classmethod
+    def bulk(cls, items: Iterable[tuple[Book, str]]) -> list["BorrowedBook"]:
+        """Массовое создание выдач из пар (книга, дата выдачи)"""
+        parse = _day_parser()
+        return [cls._from_day(book, parse(issue_date)) for book, issue_date in items]
 
     def mark_returned(self) -> None:
-        self.returned = True
-
-    def is_overdue(self) -> bool:
-        if self.returned:
+        if not self._returned:
+            self._returned = True
+            self._returned_day = date.today().toordinal()
+            if self._observers:
+                for observer in list(self._observers):
+                    observer._loan_returned(self)
+
+    def _attach_observer(self, observer) -> None:
+        if self._observers is None:
+            self._observers = []
+        self._observers.append(observer)
+
+    def _detach_observer(self, observer) -> None:
+        self._observers.remove(observer)
+        if not self._observers:
+            self._observers = None
+
+    def is_overdue(self, as_of: str | date | None = None) -> bool:
+        if as_of is None:
+            return not self._returned and date.today().toordinal() > self._return_day
+        return self._is_overdue_on(_as_of_day(as_of))
+
+    def _is_overdue_on(self, day: int) -> bool:
+        # Просрочена, если срок прошёл, а на этот день книгу ещё не вернули.
+        # Книга, возвращённая в неизвестный день, не просрочена ни на какой.
+        if day <= self._return_day:
             return False
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        return current_date > self.return_date
+        if not self._returned:
+            return True
+        return self._returned_day is not None and self._returned_day > day
 
     def __str__(self) -> str:
-        status = "возвращена" if self.returned else "не возвращена"
-        overdue = " (просрочена)" if self.is_overdue() else ""
+        return self._render(date.today().toordinal())
+
+    def _render(self, today: int, as_of: int | None = None) -> str:
+        status = "возвращена" if self._returned else "не возвращена"
+        if as_of is None:
+            is_overdue = not self._returned and today > self._return_day
+        else:
+            is_overdue = self._is_overdue_on(as_of)
+        overdue = " (просрочена)" if is_overdue else ""
         return (
             f"{self.book} - выдана: {self.issue_date}, "
             f"вернуть до: {self.return_date} [{status}]{overdue}"
         )
 
 
+class _TrackerLink:
+    """Подписка трекера на выдачи, не удерживающая сам трекер.
+
+    Иначе выдача держала бы трекеры всех временных карточек (a & b, a + b),
+    через которые она когда-либо прошла.
+    """
+
+    __slots__ = ("_tracker", "loans")
+
+    def __init__(self, tracker: "_OverdueTracker") -> None:
+        self._tracker = weakref.ref(tracker)
+        self.loans: dict[int, BorrowedBook] = {}
+
+    def detach_all(self) -> None:
+        for borrowed_book in self.loans.values():
+            borrowed_book._detach_observer(self)
+        self.loans.clear()
+
+    def _loan_returned(self, borrowed_book: BorrowedBook) -> None:
+        tracker = self._tracker()
+        if tracker is not None:
+            tracker._loan_returned(borrowed_book)
+
+    def _due_changed(self, borrowed_book: BorrowedBook, previous_day: int) -> None:
+        tracker = self._tracker()
+        if tracker is not None:
+            tracker._due_changed(borrowed_book, previous_day)
+
+
+class _OverdueTracker:
+    """Текущие число и стоимость просроченных выдач одной карточки.
+
+    Обновляется при выдаче, возврате и изменении срока, а смену дня
+    догоняет при первом запросе: выдачи ждут своего срока в куче.
+    """
+
+    def __init__(self) -> None:
+        # ConcurrentSubscriber подставляет сюда блокировку своей полосы.
+        self._lock = nullcontext()
+        self._loans: dict[int, BorrowedBook] = {}
+        self._seqs: dict[int, list[int]] = {}
+        self._due: list[tuple[int, int]] = []
+        self._overdue: dict[int, float] = {}
+        # Дробь точна: прибавления и вычитания цен не накапливают погрешность.
+        self._cost = Fraction(0)
+        self._day = date.today().toordinal()
+        self._link = _TrackerLink(self)
+
+    def __del__(self) -> None:
+        self._link.detach_all()
+
+    def add(self, seq: int, borrowed_book: BorrowedBook) -> None:
+        with self._lock:
+            self._loans[seq] = borrowed_book
+            seqs = self._seqs.setdefault(id(borrowed_book), [])
+            if not seqs:
+                self._link.loans[id(borrowed_book)] = borrowed_book
+                borrowed_book._attach_observer(self._link)
+            seqs.append(seq)
+            self._start(seq, borrowed_book)
+            if len(self._due) > 2 * len(self._loans) + 16:
+                self._due = [
+                    (day, s) for day, s in self._due if self._is_pending(day, s)
+                ]
+                heapify(self._due)
+
+    def discard(self, seq: int) -> None:
+        with self._lock:
+            self._stop(seq)
+            borrowed_book = self._loans.pop(seq)
+            seqs = self._seqs[id(borrowed_book)]
+            seqs.remove(seq)
+            if not seqs:
+                del self._seqs[id(borrowed_book)]
+                del self._link.loans[id(borrowed_book)]
+                borrowed_book._detach_observer(self._link)
+
+    def _start(self, seq: int, borrowed_book: BorrowedBook) -> None:
+        if borrowed_book.returned:
+            return
+        if self._day > borrowed_book._return_day:
+            price = borrowed_book.book.price
+            self._overdue[seq] = price
+            self._cost += Fraction(price)
+        else:
+            heappush(self._due, (borrowed_book._return_day, seq))
+
+    def _stop(self, seq: int) -> None:
+        # Запись в куче остаётся и отбрасывается при извлечении.
+        price = self._overdue.pop(seq, None)
+        if price is not None:
+            self._cost -= Fraction(price)
+
+    def _is_pending(self, day: int, seq: int) -> bool:
+        borrowed_book = self._loans.get(seq)
+        return (
+            borrowed_book is not None
+            and not borrowed_book.returned
+            and borrowed_book._return_day == day
+            and seq not in self._overdue
+        )
+
+    def _roll(self) -> None:
+        today = date.today().toordinal()
+        if today == self._day:
+            return
+        if today < self._day:
+            # Часы перевели назад: пересчитываем с нуля.
+            self._day = today
+            self._due, self._overdue, self._cost = [], {}, Fraction(0)
+            for seq, borrowed_book in self._loans.items():
+                self._start(seq, borrowed_book)
+            return
+        self._day = today
+        while self._due and self._due[0][0] < today:
+            day, seq = heappop(self._due)
+            if self._is_pending(day, seq):
+                self._start(seq, self._loans[seq])
+
+    def totals(self) -> tuple[int, float]:
+        with self._lock:
+            self._roll()
+            return len(self._overdue), float(self._cost)
+
+    def books(self) -> list[BorrowedBook]:
+        with self._lock:
+            self._roll()
+            # Номера растут вместе с позицией на карточке.
+            return [self._loans[seq] for seq in sorted(self._overdue)]
+
+    def snapshot(self) -> tuple[int, float, Callable[[], list[BorrowedBook]]]:
+        """Итоги и отложенный список книг на один и тот же момент"""
+        with self._lock:
+            self._roll()
+            loans = {seq: self._loans[seq] for seq in self._overdue}
+            cost = float(self._cost)
+        # Сортировка — самая дорогая часть, она откладывается до обращения.
+        return len(loans), cost, lambda: [loans[seq] for seq in sorted(loans)]
+
+    # Вызываются выдачами при возврате и изменении срока.
+    def _loan_returned(self, borrowed_book: BorrowedBook) -> None:
+        with self._lock:
+            for seq in self._seqs[id(borrowed_book)]:
+                self._stop(seq)
+
+    def _due_changed(self, borrowed_book: BorrowedBook, previous_day: int) -> None:
+        with self._lock:
+            for seq in self._seqs[id(borrowed_book)]:
+                self._stop(seq)
+                self._start(seq, borrowed_book)
+
+
 class Subscriber:
     MAX_SIZE = 100
 
@@ -84,7 +411,20 @@ class Subscriber:
         self.library_id: str = library_id
         self.size: int = size
         self.count: int = 0
-        self._books: list[BorrowedBook] = []
+        # Выдачи в порядке карточки: порядковый номер -> выдача. Удаление из
+        # словаря — O(1); позиционные списки строятся заново после удалений.
+        self._loans: dict[int, BorrowedBook] = {}
+        self._positions: tuple[list[int], list[BorrowedBook]] | None = ([], [])
+        # Вторичные индексы: ключ -> {порядковый номер: выдача}.
+        self._next_seq: int = 0
+        self._index_keys: dict[int, tuple] = {}
+        self._by_author: dict[str, dict[int, BorrowedBook]] = {}
+        self._by_publisher: dict[str, dict[int, BorrowedBook]] = {}
+        self._by_year: dict[int, dict[int, BorrowedBook]] = {}
+        self._by_book: dict[tuple, dict[int, BorrowedBook]] = {}
+        # Наблюдатели (например, DueDateIndex) узнают о выдаче и возврате книг.
+        self._observers: list = []
+        self._debts = _OverdueTracker()
 
     def edit(self) -> None:
         """Редактирование данных абонента через консоль"""
@@ -95,127 +435,271 @@ class Subscriber:
         return self.size
 
     def __str__(self) -> str:
-        result = [
-            f"Абонент: {self.name}",
-            f"Библиотечный номер: {self.library_id}",
-            f"Книг на руках: {self.count}/{self.size}",
-            "Список книг:",
-        ]
-        for i, book in enumerate(self._books, 1):
-            result.append(f"  {i}. {book}")
-        return "\n".join(result)
+        return "\n".join(self.iter_report())
+
+    def iter_report(self, offset: int = 0, limit: int | None = None) -> Iterator[str]:
+        """Строки отчёта по одной; offset и limit выбирают страницу списка книг"""
+        today = date.today().toordinal()
+        books = self._books
+        yield f"Абонент: {self.name}"
+        yield f"Библиотечный номер: {self.library_id}"
+        yield f"Книг на руках: {self.count}/{self.size}"
+        yield "Список книг:"
+        yield from _book_lines(books, offset, limit, today)
+
+    def write_report(
+        self, stream: TextIO, offset: int = 0, limit: int | None = None
+    ) -> None:
+        _write_lines(stream, self.iter_report(offset, limit))
 
     def __repr__(self) -> str:
         return f"Subscriber('{self.name}', '{self.library_id}', {self.size})"
 
+    def _order(self) -> tuple[list[int], list[BorrowedBook]]:
+        positions = self._positions
+        if positions is None:
+            positions = self._positions = (
+                list(self._loans),
+                list(self._loans.values()),
+            )
+        return positions
+
+    @property
+    def _books(self) -> list[BorrowedBook]:
+        return self._order()[1]
+
     def __getitem__(self, index: int) -> BorrowedBook:
-        if 0 <= index < len(self._books):
-            return self._books[index]
+        books = (self._positions or self._order())[1]
+        if 0 <= index < len(books):
+            return books[index]
         raise IndexError("Индекс вне диапазона")
 
     def __setitem__(self, index: int, value: BorrowedBook) -> None:
-        if 0 <= index < len(self._books):
-            if self._books[index] != value:
-                self._books[index] = value
+        seqs, books = self._order()
+        if 0 <= index < len(books):
+            previous = books[index]
+            seq = seqs[index]
+            if previous != value:
+                books[index] = value
+                self._loans[seq] = value
+            # Переиндексируем всегда: выдачу могли изменить через ссылку.
+            self._unindex(seq)
+            self._index(seq, value)
+            self._notify("_loan_removed", previous)
+            self._notify("_loan_added", value)
         else:
             raise IndexError("Индекс вне диапазона")
 
     def __len__(self) -> int:
-        return len(self._books)
+        return len(self._loans)
 
     def __contains__(self, book: Book) -> bool:
-        return any(borrowed_book.book == book for borrowed_book in self._books)
+        return self._find_seq(book) is not None
 
     def __add__(self, other) -> "Subscriber":
         if not isinstance(other, Subscriber):
             return None
-
-        if self.library_id != other.library_id:
-            raise ValueError("Можно объединять только карточки одного абонента")
-
-        new_size = max(self.size, other.size)
-        result = Subscriber(self.name, self.library_id, new_size)
-        result._books = self._books.copy()
-        result.count = self.count
-
-        for book in other._books:
-            if book not in result._books and result.count < result.size:
-                result._books.append(book)
-                result.count += 1
-
-        return result
+        return Subscriber.union_all((self, other))
 
     def __and__(self, other) -> "Subscriber":
         if not isinstance(other, Subscriber):
             return None
-
-        result = Subscriber(
-            f"{self.name} & {other.name}", "intersection", self.MAX_SIZE
-        )
-        for book in self._books:
-            if (
-                any(book.book == other_book.book for other_book in other._books)
-                and result.count < result.size
-            ):
-                result._books.append(book)
-                result.count += 1
-        return result
+        return Subscriber.intersect_all((self, other))
 
     def __sub__(self, other) -> "Subscriber":
         if not isinstance(other, Subscriber):
             return None
 
+        other_books = {borrowed.book for borrowed in other._books}
         result = Subscriber(self.name, self.library_id, self.size)
         for book in self._books:
-            if (
-                not any(book.book == other_book.book for other_book in other._books)
-                and result.count < result.size
-            ):
-                result._books.append(book)
-                result.count += 1
+            if result.count >= result.size:
+                break
+            if book.book not in other_books:
+                result._append(book)
+        return result
+
+    @staticmethod
+    def union_all(cards: Iterable["Subscriber"]) -> "Subscriber":
+        """Объединение карточек одного абонента за один проход (как a + b + ...)"""
+        cards = list(cards)
+        if not cards:
+            raise ValueError("Нужна хотя бы одна карточка")
+        first = cards[0]
+        if any(card.library_id != first.library_id for card in cards):
+            raise ValueError("Можно объединять только карточки одного абонента")
+
+        result = Subscriber(first.name, first.library_id, first.size)
+        # Выдачи сравниваются по тождественности, как при проверке в списке.
+        seen: set[int] = set()
+        for book in first._books:
+            result._append(book)
+            seen.add(id(book))
+        for card in cards[1:]:
+            result.size = max(result.size, card.size)
+            for book in card._books:
+                if result.count >= result.size:
+                    break
+                if id(book) not in seen:
+                    result._append(book)
+                    seen.add(id(book))
+        return result
+
+    @staticmethod
+    def intersect_all(cards: Iterable["Subscriber"]) -> "Subscriber":
+        """Пересечение карточек за один проход (как a & b & ...)"""
+        cards = list(cards)
+        if not cards:
+            raise ValueError("Нужна хотя бы одна карточка")
+
+        others = [{borrowed.book for borrowed in card._books} for card in cards[1:]]
+        result = Subscriber(
+            " & ".join(card.name for card in cards), "intersection", Subscriber.MAX_SIZE
+        )
+        for book in cards[0]._books:
+            if result.count >= result.size:
+                break
+            if all(book.book in books for books in others):
+                result._append(book)
         return result
 
     def add_book(self, book: Book, issue_date: str = "") -> None:
         if self.count >= self.size:
             raise ValueError(f"Достигнут лимит книг: {self.size}")
 
-        borrowed_book = BorrowedBook(book, issue_date)
-        self._books.append(borrowed_book)
+        self._append(BorrowedBook(book, issue_date))
+
+    def add_books(self, items: Iterable[tuple[Book, str]]) -> None:
+        """То же, что add_book для каждой пары, но даты разбираются один раз"""
+        parse = _day_parser()
+        for book, issue_date in items:
+            if self.count >= self.size:
+                raise ValueError(f"Достигнут лимит книг: {self.size}")
+            self._append(BorrowedBook._from_day(book, parse(issue_date)))
+
+    def _append(self, borrowed_book: BorrowedBook) -> None:
+        seq = self._next_seq
+        self._next_seq += 1
+        self._loans[seq] = borrowed_book
+        if self._positions is not None:
+            self._positions[0].append(seq)
+            self._positions[1].append(borrowed_book)
+        self._index(seq, borrowed_book)
         self.count += 1
+        self._notify("_loan_added", borrowed_book)
 
-    def remove_book(self, book: Book) -> None:
-        for i, borrowed_book in enumerate(self._books):
+    def _find_seq(self, book: Book) -> int | None:
+        """Номер первой по порядку выдачи этой книги; None — книги нет"""
+        if not isinstance(book, Book):
+            return None
+        # Ключ индекса — снимок полей на момент выдачи. Книгу могли изменить
+        # через ссылку, поэтому совпадение проверяется, а при промахе карточка
+        # просматривается целиком, как без индекса.
+        for seq, borrowed_book in self._by_book.get(_book_key(book), {}).items():
+            if borrowed_book.book == book:
+                return seq
+        for seq, borrowed_book in self._loans.items():
             if borrowed_book.book == book:
-                self._books.pop(i)
-                self.count -= 1
-                return
-        raise ValueError("Книга не найдена в списке")
+                return seq
+        return None
 
-    def find_overdue_books(self) -> list[BorrowedBook]:
-        return [book for book in self._books if book.is_overdue() and not book.returned]
+    def _first_seq(self, book: Book) -> int:
+        seq = self._find_seq(book)
+        if seq is None:
+            raise ValueError("Книга не найдена в списке")
+        return seq
 
-    def find_by_author(self, author: str) -> list[BorrowedBook]:
+    def remove_book(self, book: Book) -> None:
+        seq = self._first_seq(book)
+        borrowed_book = self._loans.pop(seq)
+        self._positions = None
+        self._unindex(seq)
+        self.count -= 1
+        self._notify("_loan_removed", borrowed_book)
+
+    def _attach_observer(self, observer) -> None:
+        self._observers.append(observer)
+
+    def _detach_observer(self, observer) -> None:
+        self._observers.remove(observer)
+
+    def _notify(self, event: str, borrowed_book: BorrowedBook) -> None:
+        for observer in self._observers:
+            getattr(observer, event)(self, borrowed_book)
+
+    def _indexes(self) -> tuple[dict, dict, dict, dict]:
+        return self._by_author, self._by_publisher, self._by_year, self._by_book
+
+    def _index(self, seq: int, borrowed_book: BorrowedBook) -> None:
+        book = borrowed_book.book
+        # Ключи в нижнем регистре интернируются, как поля Book: иначе каждая
+        # выдача хранила бы свои копии строк.
+        keys = (
+            _intern(book.author.lower()),
+            _intern(book.publisher.lower()),
+            book.year,
+            _book_key(book),
+        )
+        self._index_keys[seq] = keys
+        for index, key in zip(self._indexes(), keys):
+            bucket = index.setdefault(key, {})
+            # После __setitem__ номер может оказаться не последним в корзине.
+            out_of_order = bool(bucket) and next(reversed(bucket)) > seq
+            bucket[seq] = borrowed_book
+            if out_of_order:
+                index[key] = dict(sorted(bucket.items()))
+        self._debts.add(seq, borrowed_book)
+
+    def _unindex(self, seq: int) -> None:
+        for index, key in zip(self._indexes(), self._index_keys.pop(seq)):
+            bucket = index[key]
+            del bucket[seq]
+            if not bucket:
+                del index[key]
+        self._debts.discard(seq)
+
+    def find_overdue_books(self, as_of: str | date | None = None) -> list[BorrowedBook]:
+        """Книги, просроченные на дату as_of (по умолчанию — сегодня)"""
+        if as_of is None:
+            return self._debts.books()
+        # Текущие суммы ведутся только на сегодня, другую дату считаем обходом.
+        return self._overdue_on(_as_of_day(as_of))
+
+    def _overdue_on(self, day: int) -> list[BorrowedBook]:
         return [
-            book for book in self._books if book.book.author.lower() == author.lower()
+            borrowed_book
+            for borrowed_book in self._books
+            if borrowed_book._is_overdue_on(day)
         ]
 
+    def find_by_author(self, author: str) -> list[BorrowedBook]:
+        return list(self._by_author.get(author.lower(), {}).values())
+
     def find_by_publisher(self, publisher: str) -> list[BorrowedBook]:
-        return [
-            book
-            for book in self._books
-            if book.book.publisher.lower() == publisher.lower()
-        ]
+        return list(self._by_publisher.get(publisher.lower(), {}).values())
 
     def find_by_year(self, year: int) -> list[BorrowedBook]:
-        return [book for book in self._books if book.book.year == year]
-
-    def calculate_debt_cost(self) -> float:
-        overdue_books = self.find_overdue_books()
-        return sum(book.book.price for book in overdue_books)
-
-    def generate_debt(self) -> "Debt":
-        overdue_books = self.find_overdue_books()
-        return Debt(self.name, self.library_id, overdue_books)
+        return list(self._by_year.get(year, {}).values())
+
+    def calculate_debt_cost(self, as_of: str | date | None = None) -> float:
+        if as_of is None:
+            return self._debts.totals()[1]
+        return fsum(book.book.price for book in self.find_overdue_books(as_of))
+
+    def generate_debt(self, as_of: str | date | None = None) -> "Debt":
+        """Итоги берутся из текущих сумм, список книг строится при первом обращении.
+
+        Долг на другую дату as_of считается сразу.
+        """
+        if as_of is None:
+            count, cost, load_books = self._debts.snapshot()
+            return Debt._lazy(self.name, self.library_id, count, cost, load_books)
+        day = _as_of_day(as_of)
+        books = self._overdue_on(day)
+        cost = fsum(book.book.price for book in books)
+        return Debt._lazy(
+            self.name, self.library_id, len(books), cost, lambda: books, day
+        )
 
 
 class Debt:
@@ -224,15 +708,56 @@ class Debt:
     ) -> None:
         self.subscriber_name: str = subscriber_name
         self.library_id: str = library_id
-        self.overdue_books: list[BorrowedBook] = overdue_books
+        self.overdue_books = overdue_books
+        self.overdue_count: int = len(overdue_books)
         self.total_cost: float = sum(book.book.price for book in overdue_books)
+        self._as_of_day: int | None = None
+
+    @classmethod
+    def _lazy(
+        cls,
+        subscriber_name: str,
+        library_id: str,
+        overdue_count: int,
+        total_cost: float,
+        load_books: Callable[[], list[BorrowedBook]],
+        as_of_day: int | None = None,
+    ) -> "Debt":
+        debt = cls.__new__(cls)
+        debt.subscriber_name = subscriber_name
+        debt.library_id = library_id
+        debt._overdue_books = None
+        debt._load_books = load_books
+        debt.overdue_count = overdue_count
+        debt.total_cost = total_cost
+        debt._as_of_day = as_of_day
+        return debt
+
+    @property
+    def overdue_books(self) -> list[BorrowedBook]:
+        if self._overdue_books is None:
+            self._overdue_books = self._load_books()
+        return self._overdue_books
+
+    @overdue_books.setter
+    def overdue_books(self, value: list[BorrowedBook]) -> None:
+        self._overdue_books = value
 
     def __str__(self) -> str:
-        result = [
-            f"Долг абонента: {self.subscriber_name} ({self.library_id})",
-            f"Общая стоимость долга: {self.total_cost:.2f}",
-            "Просроченные книги:",
-        ]
-        for i, book in enumerate(self.overdue_books, 1):
-            result.append(f"  {i}. {book}")
-        return "\n".join(result)
+        return "\n".join(self.iter_report())
+
+    def iter_report(self, offset: int = 0, limit: int | None = None) -> Iterator[str]:
+        """Строки отчёта по одной; offset и limit выбирают страницу списка книг"""
+        today = date.today().toordinal()
+        yield f"Долг абонента: {self.subscriber_name} ({self.library_id})"
+        yield f"Общая стоимость долга: {self.total_cost:.2f}"
+        yield "Просроченные книги:"
+        # Долг на дату as_of и помечает просрочку на эту дату.
+        yield from _book_lines(
+            self.overdue_books, offset, limit, today, self._as_of_day
+        )
+
+    def write_report(
+        self, stream: TextIO, offset: int = 0, limit: int | None = None
+    ) -> None:
+        _write_lines(stream, self.iter_report(offset, limit))
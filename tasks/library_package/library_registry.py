@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from datetime import date
+from typing import Iterable, Iterator
+from zlib import crc32
+
+from .book_search import BookSearchIndex
+from .due_date_index import DueDateIndex
+from .library_model import Book, BorrowedBook, Debt, Subscriber, _as_of_day
+
+
+class Library:
+    """Реестр абонентов, разбитый на шарды по хэшу библиотечного номера"""
+
+    def __init__(self, shard_count: int = 16) -> None:
+        if shard_count <= 0:
+            raise ValueError("Количество шардов должно быть положительным")
+        self.shard_count = shard_count
+        self._shards: list[dict[str, Subscriber]] = [{} for _ in range(shard_count)]
+        # Обратный индекс: книга -> {библиотечный номер: число выдач}.
+        self._holders: dict[Book, dict[str, int]] = {}
+        # Книги выдач на момент выдачи; одна выдача может стоять в карточке дважды.
+        self._loan_books: dict[tuple[int, int], list[Book]] = {}
+        self.due_dates = DueDateIndex()
+        # Полнотекстовый поиск по книгам, которые сейчас на руках.
+        self.catalog = BookSearchIndex()
+
+    def shard_of(self, library_id: str) -> int:
+        # crc32 не зависит от PYTHONHASHSEED, поэтому шард стабилен между процессами.
+        return crc32(library_id.encode("utf-8")) % self.shard_count
+
+    def shard(self, number: int) -> list[Subscriber]:
+        return list(self._shards[number].values())
+
+    def register(self, subscriber: Subscriber) -> None:
+        shard = self._shards[self.shard_of(subscriber.library_id)]
+        if subscriber.library_id in shard:
+            raise ValueError("Абонент с таким номером уже зарегистрирован")
+        shard[subscriber.library_id] = subscriber
+        subscriber._attach_observer(self)
+        for borrowed_book in subscriber._books:
+            self._loan_added(subscriber, borrowed_book)
+        self.due_dates.track(subscriber)
+        self.catalog.track(subscriber)
+
+    def unregister(self, library_id: str) -> Subscriber:
+        subscriber = self[library_id]
+        self.due_dates.untrack(subscriber)
+        self.catalog.untrack(subscriber)
+        subscriber._detach_observer(self)
+        for borrowed_book in subscriber._books:
+            self._loan_removed(subscriber, borrowed_book)
+        del self._shards[self.shard_of(library_id)][library_id]
+        return subscriber
+
+    def get(self, library_id: str) -> Subscriber | None:
+        return self._shards[self.shard_of(library_id)].get(library_id)
+
+    def __getitem__(self, library_id: str) -> Subscriber:
+        subscriber = self.get(library_id)
+        if subscriber is None:
+            raise KeyError(f"Абонент не найден: {library_id}")
+        return subscriber
+
+    def __contains__(self, library_id: str) -> bool:
+        return self.get(library_id) is not None
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def __iter__(self) -> Iterator[Subscriber]:
+        for shard in self._shards:
+            yield from shard.values()
+
+    def holders_of(self, book: Book) -> list[Subscriber]:
+        """Абоненты, у которых на руках эта книга"""
+        return [self[library_id] for library_id in self._holders.get(book, {})]
+
+    def issue(self, library_id: str, book: Book, issue_date: str = "") -> None:
+        self[library_id].add_book(book, issue_date)
+
+    def issue_many(self, items: Iterable[tuple[str, Book, str]]) -> None:
+        for library_id, book, issue_date in items:
+            self.issue(library_id, book, issue_date)
+
+    def return_book(self, library_id: str, book: Book) -> None:
+        self[library_id].remove_book(book)
+
+    def return_many(self, items: Iterable[tuple[str, Book]]) -> None:
+        for library_id, book in items:
+            self.return_book(library_id, book)
+
+    def generate_debts(self, as_of: str | date | None = None) -> list[Debt]:
+        """Долги всех абонентов с просроченными на as_of книгами"""
+        if as_of is not None and _as_of_day(as_of) < date.today().toordinal():
+            # Выдачи, возвращённые после as_of, календарь уже не хранит.
+            debts = (subscriber.generate_debt(as_of) for subscriber in self)
+            return [debt for debt in debts if debt.overdue_count]
+        debtors: dict[int, Subscriber] = {}
+        for subscriber, _ in self.due_dates.overdue(as_of):
+            debtors.setdefault(id(subscriber), subscriber)
+        return [subscriber.generate_debt(as_of) for subscriber in debtors.values()]
+
+    # Вызываются абонентами при выдаче и возврате книг.
+    def _loan_added(self, subscriber: Subscriber, borrowed_book: BorrowedBook) -> None:
+        book = borrowed_book.book
+        self._loan_books.setdefault((id(subscriber), id(borrowed_book)), []).append(
+            book
+        )
+        holders = self._holders.setdefault(book, {})
+        holders[subscriber.library_id] = holders.get(subscriber.library_id, 0) + 1
+
+    def _loan_removed(
+        self, subscriber: Subscriber, borrowed_book: BorrowedBook
+    ) -> None:
+        # Книгу берём из момента выдачи: её могли подменить через ссылку.
+        key = (id(subscriber), id(borrowed_book))
+        books = self._loan_books[key]
+        book = books.pop()
+        if not books:
+            del self._loan_books[key]
+        holders = self._holders[book]
+        holders[subscriber.library_id] -= 1
+        if not holders[subscriber.library_id]:
+            del holders[subscriber.library_id]
+            if not holders:
+                del self._holders[book]
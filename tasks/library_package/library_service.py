@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Асинхронный сервис выдачи книг: JSON-строки через TCP или stdin/stdout"""
+
+import argparse
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .library_model import Book, BorrowedBook, Subscriber
+from .library_registry import Library
+from .library_storage import SQLiteLibraryStore
+
+
+def _loan_to_dict(borrowed_book: BorrowedBook) -> dict:
+    book = borrowed_book.book
+    return {
+        "author": book.author,
+        "title": book.title,
+        "year": book.year,
+        "publisher": book.publisher,
+        "price": book.price,
+        "issue_date": borrowed_book.issue_date,
+        "return_date": borrowed_book.return_date,
+        "returned": borrowed_book.returned,
+    }
+
+
+def _book_from_dict(data: dict) -> Book:
+    return Book(
+        data["author"], data["title"], data["year"], data["publisher"], data["price"]
+    )
+
+
+class LibraryService:
+    """Обработчик запросов поверх Library с блокировкой на каждого абонента"""
+
+    def __init__(self, library: Library | None = None, store_path=None) -> None:
+        self.library = library if library is not None else Library()
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._store_path = store_path
+        self._store: SQLiteLibraryStore | None = None
+        # sqlite3 привязывает соединение к потоку: все обращения идут через один.
+        self._executor = (
+            ThreadPoolExecutor(max_workers=1) if store_path is not None else None
+        )
+
+    async def open(self) -> None:
+        """Открывает хранилище; абоненты из него загружаются при первом обращении"""
+        if self._executor is None:
+            return
+        self._store = await self._in_store_thread(SQLiteLibraryStore, self._store_path)
+
+    async def _load(self, library_id: str) -> None:
+        if self._store is None or library_id in self.library:
+            return
+        subscriber = await self._in_store_thread(self._fetch, library_id)
+        if subscriber is not None:
+            self.library.register(subscriber)
+
+    def _fetch(self, library_id: str) -> Subscriber | None:
+        return self._store[library_id] if library_id in self._store else None
+
+    async def close(self) -> None:
+        if self._executor is None:
+            return
+        if self._store is not None:
+            await self._in_store_thread(self._store.close)
+        self._executor.shutdown()
+
+    async def _in_store_thread(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, function, *args)
+
+    def lock_for(self, library_id: str) -> asyncio.Lock:
+        lock = self._locks.get(library_id)
+        if lock is None:
+            lock = self._locks[library_id] = asyncio.Lock()
+        return lock
+
+    async def handle(self, request: dict) -> dict:
+        """Выполняет один запрос; ошибки возвращаются в ответе, а не бросаются"""
+        response = {"id": request.get("id")} if "id" in request else {}
+        handler = self._handlers.get(request.get("op"))
+        try:
+            if handler is None:
+                raise ValueError(f"Неизвестная операция: {request.get('op')}")
+            library_id = request["library_id"]
+            async with self.lock_for(library_id):
+                await self._load(library_id)
+                result = handler(self, library_id, request)
+                if request["op"] in self._mutating and self._store is not None:
+                    # Сохраняем под той же блокировкой, чтобы не записать
+                    # карточку посреди следующего изменения.
+                    await self._in_store_thread(
+                        self._store.save, self.library[library_id]
+                    )
+        except Exception as error:
+            # Любая ошибка запроса — ответ клиенту, иначе он не дождётся ответа по id.
+            response.update(ok=False, error=str(error.args[0] if error.args else ""))
+        else:
+            response.update(ok=True, result=result)
+        return response
+
+    async def handle_line(self, line: str) -> str:
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            request = None
+        if not isinstance(request, dict):
+            response = {"ok": False, "error": "Некорректный запрос"}
+        else:
+            response = await self.handle(request)
+        return json.dumps(response, ensure_ascii=False)
+
+    def _register(self, library_id: str, request: dict) -> None:
+        subscriber = Subscriber(
+            request.get("name", ""),
+            library_id,
+            request.get("size", Subscriber.MAX_SIZE),
+        )
+        self.library.register(subscriber)
+
+    def _issue(self, library_id: str, request: dict) -> dict:
+        subscriber = self.library[library_id]
+        subscriber.add_book(
+            _book_from_dict(request["book"]), request.get("issue_date", "")
+        )
+        return _loan_to_dict(subscriber[len(subscriber) - 1])
+
+    def _return(self, library_id: str, request: dict) -> None:
+        self.library.return_book(library_id, _book_from_dict(request["book"]))
+
+    def _find(self, library_id: str, request: dict) -> list[dict]:
+        subscriber = self.library[library_id]
+        finders = {
+            "author": subscriber.find_by_author,
+            "publisher": subscriber.find_by_publisher,
+            "year": subscriber.find_by_year,
+        }
+        if request["by"] not in finders:
+            raise ValueError(f"Неизвестный критерий поиска: {request['by']}")
+        return [
+            _loan_to_dict(loan) for loan in finders[request["by"]](request["value"])
+        ]
+
+    def _debt(self, library_id: str, request: dict) -> dict:
+        debt = self.library[library_id].generate_debt(request.get("as_of"))
+        return {
+            "total_cost": debt.total_cost,
+            "overdue_books": [_loan_to_dict(loan) for loan in debt.overdue_books],
+        }
+
+    _handlers = {
+        "register": _register,
+        "issue": _issue,
+        "return": _return,
+        "find": _find,
+        "debt": _debt,
+    }
+    _mutating = {"register", "issue", "return"}
+
+    async def serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Запросы одного соединения обрабатываются конкурентно; ответы
+        приходят по мере готовности и сопоставляются по полю id"""
+        tasks = set()
+
+        async def respond(line: str) -> None:
+            writer.write((await self.handle_line(line) + "\n").encode("utf-8"))
+            await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.create_task(respond(line.decode("utf-8")))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def serve_tcp(self, host: str = "127.0.0.1", port: int = 0):
+        return await asyncio.start_server(self.serve_connection, host, port)
+
+    async def serve_stdio(self) -> None:
+        loop = asyncio.get_running_loop()
+        tasks = set()
+
+        async def respond(line: str) -> None:
+            print(await self.handle_line(line), flush=True)
+
+        while line := await loop.run_in_executor(None, sys.stdin.readline):
+            if line.strip():
+                task = asyncio.create_task(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+async def _run(arguments: argparse.Namespace) -> None:
+    service = LibraryService(store_path=arguments.db)
+    await service.open()
+    try:
+        if arguments.port is None:
+            await service.serve_stdio()
+        else:
+            server = await service.serve_tcp(arguments.host, arguments.port)
+            async with server:
+                await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="порт TCP; без него — stdin/stdout")
+    parser.add_argument("--db", type=Path, help="файл SQLite для сохранения")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .library_model import Book, BorrowedBook, Subscriber
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    id INTEGER PRIMARY KEY,
+    author TEXT NOT NULL,
+    title TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    publisher TEXT NOT NULL,
+    price REAL NOT NULL,
+    author_key TEXT NOT NULL,
+    publisher_key TEXT NOT NULL,
+    UNIQUE (author, title, year, publisher, price)
+);
+CREATE TABLE IF NOT EXISTS subscribers (
+    library_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS loans (
+    library_id TEXT NOT NULL REFERENCES subscribers (library_id),
+    position INTEGER NOT NULL,
+    book_id INTEGER NOT NULL REFERENCES books (id),
+    issue_day INTEGER NOT NULL,
+    return_day INTEGER NOT NULL,
+    -- 0 — не возвращена, 1 — возвращена в неизвестный день, иначе день возврата.
+    returned INTEGER NOT NULL,
+    PRIMARY KEY (library_id, position)
+);
+CREATE INDEX IF NOT EXISTS books_by_author ON books (author_key);
+CREATE INDEX IF NOT EXISTS books_by_publisher ON books (publisher_key);
+CREATE INDEX IF NOT EXISTS books_by_year ON books (year);
+CREATE INDEX IF NOT EXISTS loans_by_book ON loans (book_id);
+CREATE INDEX IF NOT EXISTS loans_open_by_due ON loans (returned, return_day);
+"""
+
+_LOAN_COLUMNS = """
+    SELECT l.library_id, b.id, b.author, b.title, b.year, b.publisher, b.price,
+           l.issue_day, l.return_day, l.returned
+    FROM loans AS l JOIN books AS b ON b.id = l.book_id
+"""
+
+
+class SQLiteLibraryStore:
+    """Хранилище абонентов и выдач в SQLite; карточки загружаются по обращению"""
+
+    def __init__(self, path: str | Path = ":memory:") -> None:
+        self._connection = sqlite3.connect(str(path))
+        self._connection.executescript(_SCHEMA)
+        self._book_ids: dict[Book, int] = {}
+        self._loaded: dict[str, Subscriber] = {}
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "SQLiteLibraryStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def save(self, subscriber: Subscriber) -> None:
+        self.save_many([subscriber])
+
+    def save_many(self, subscribers: Iterable[Subscriber]) -> None:
+        """Сохраняет карточки целиком в одной транзакции"""
+        subscribers = list(subscribers)
+        seen: set[str] = set()
+        for subscriber in subscribers:
+            if subscriber.library_id in seen:
+                raise ValueError(
+                    f"Библиотечный номер повторяется в пакете: {subscriber.library_id}"
+                )
+            seen.add(subscriber.library_id)
+        # Новые id книг попадают в кэш только после фиксации транзакции:
+        # при откате строк books с этими id в базе нет.
+        new_ids: dict[Book, int] = {}
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO subscribers (library_id, name, size) VALUES (?, ?, ?) "
+                "ON CONFLICT (library_id) DO UPDATE SET "
+                "name = excluded.name, size = excluded.size",
+                [(s.library_id, s.name, s.size) for s in subscribers],
+            )
+            self._connection.executemany(
+                "DELETE FROM loans WHERE library_id = ?",
+                [(s.library_id,) for s in subscribers],
+            )
+            loans = []
+            for subscriber in subscribers:
+                for position, borrowed_book in enumerate(subscriber._books):
+                    loans.append(
+                        (
+                            subscriber.library_id,
+                            position,
+                            self._book_id(borrowed_book.book, new_ids),
+                            borrowed_book._issue_day,
+                            borrowed_book._return_day,
+                            (
+                                (borrowed_book._returned_day or 1)
+                                if borrowed_book.returned
+                                else 0
+                            ),
+                        )
+                    )
+            self._connection.executemany(
+                "INSERT INTO loans VALUES (?, ?, ?, ?, ?, ?)", loans
+            )
+        self._book_ids.update(new_ids)
+        for subscriber in subscribers:
+            self._loaded[subscriber.library_id] = subscriber
+
+    def _book_id(self, book: Book, new_ids: dict[Book, int]) -> int:
+        book_id = self._book_ids.get(book) or new_ids.get(book)
+        if book_id is None:
+            fields = (book.author, book.title, book.year, book.publisher, book.price)
+            self._connection.execute(
+                "INSERT OR IGNORE INTO books "
+                "(author, title, year, publisher, price, author_key, publisher_key) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*fields, book.author.lower(), book.publisher.lower()),
+            )
+            (book_id,) = self._connection.execute(
+                "SELECT id FROM books WHERE author = ? AND title = ? AND year = ? "
+                "AND publisher = ? AND price = ?",
+                fields,
+            ).fetchone()
+            new_ids[book] = book_id
+        return book_id
+
+    def library_ids(self) -> list[str]:
+        rows = self._connection.execute(
+            "SELECT library_id FROM subscribers ORDER BY library_id"
+        )
+        return [library_id for (library_id,) in rows]
+
+    def __len__(self) -> int:
+        (count,) = self._connection.execute(
+            "SELECT COUNT(*) FROM subscribers"
+        ).fetchone()
+        return count
+
+    def __contains__(self, library_id: str) -> bool:
+        return library_id in self._loaded or (
+            self._connection.execute(
+                "SELECT 1 FROM subscribers WHERE library_id = ?", (library_id,)
+            ).fetchone()
+            is not None
+        )
+
+    def __getitem__(self, library_id: str) -> Subscriber:
+        """Карточка абонента; выдачи читаются из базы при первом обращении"""
+        subscriber = self._loaded.get(library_id)
+        if subscriber is None:
+            subscriber = self._load(library_id)
+            self._loaded[library_id] = subscriber
+        return subscriber
+
+    def __iter__(self) -> Iterator[Subscriber]:
+        for library_id in self.library_ids():
+            yield self[library_id]
+
+    def evict(self, library_id: str) -> None:
+        """Выгружает карточку из памяти (несохранённые изменения теряются)"""
+        self._loaded.pop(library_id, None)
+
+    def _load(self, library_id: str) -> Subscriber:
+        row = self._connection.execute(
+            "SELECT name, size FROM subscribers WHERE library_id = ?", (library_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"Абонент не найден: {library_id}")
+        subscriber = Subscriber(row[0], library_id, row[1])
+        rows = self._connection.execute(
+            _LOAN_COLUMNS + " WHERE l.library_id = ? ORDER BY l.position",
+            (library_id,),
+        )
+        for _, borrowed_book in self._loans(rows):
+            subscriber._append(borrowed_book)
+        return subscriber
+
+    def _loans(self, rows: Iterable[tuple]) -> list[tuple[str, BorrowedBook]]:
+        books: dict[int, Book] = {}
+        result = []
+        for library_id, book_id, *fields, issue_day, return_day, returned in rows:
+            book = books.get(book_id)
+            if book is None:
+                book = books[book_id] = Book(*fields)
+            borrowed_book = BorrowedBook._from_day(book, issue_day)
+            borrowed_book._return_day = return_day
+            borrowed_book._returned = bool(returned)
+            borrowed_book._returned_day = returned if returned > 1 else None
+            result.append((library_id, borrowed_book))
+        return result
+
+    def find_by_author(self, author: str) -> list[tuple[str, BorrowedBook]]:
+        return self._query("b.author_key = ?", (author.lower(),))
+
+    def find_by_publisher(self, publisher: str) -> list[tuple[str, BorrowedBook]]:
+        return self._query("b.publisher_key = ?", (publisher.lower(),))
+
+    def find_by_year(self, year: int) -> list[tuple[str, BorrowedBook]]:
+        return self._query("b.year = ?", (year,))
+
+    def find_overdue(self, as_of: date | None = None) -> list[tuple[str, BorrowedBook]]:
+        """Выдачи, просроченные на as_of (по умолчанию — сегодня)"""
+        if as_of is None:
+            return self._query(
+                "l.returned = 0 AND l.return_day < ?", (date.today().toordinal(),)
+            )
+        # Книга, возвращённая после as_of, на этот день ещё не была возвращена.
+        day = as_of.toordinal()
+        return self._query(
+            "l.return_day < ? AND (l.returned = 0 OR l.returned > ?)", (day, day)
+        )
+
+    def _query(
+        self, condition: str, parameters: tuple
+    ) -> list[tuple[str, BorrowedBook]]:
+        rows = self._connection.execute(
+            _LOAN_COLUMNS + f" WHERE {condition} ORDER BY l.library_id, l.position",
+            parameters,
+        )
+        return self._loans(rows)
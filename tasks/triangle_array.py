@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from triangle_model import RightTrianglePair
+
+
+class RightTrianglePairArray:
+    """Колоночное хранилище треугольников: два непрерывных массива float64"""
+
+    def __init__(self, first: Iterable[float] = (), second: Iterable[float] = ()):
+        first = np.ascontiguousarray(first, dtype=np.float64)
+        second = np.ascontiguousarray(second, dtype=np.float64)
+        if first.ndim != 1 or first.shape != second.shape:
+            raise ValueError("Массивы катетов должны быть одномерными и одной длины")
+        if np.any(first <= 0) or np.any(second <= 0):
+            raise ValueError("Катеты должны быть положительными числами")
+        self.__first = first
+        self.__second = second
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[RightTrianglePair]) -> "RightTrianglePairArray":
+        pairs = list(pairs)
+        first = np.fromiter((t.first for t in pairs), np.float64, len(pairs))
+        second = np.fromiter((t.second for t in pairs), np.float64, len(pairs))
+        return cls(first, second)
+
+    def to_pairs(self) -> list[RightTrianglePair]:
+        return [
+            RightTrianglePair(a, b)
+            for a, b in zip(self.__first.tolist(), self.__second.tolist())
+        ]
+
+    @classmethod
+    def from_buffers(cls, first, second) -> "RightTrianglePairArray":
+        """Массив поверх любых объектов с буферным протоколом (без копирования)"""
+        return cls(np.frombuffer(first, np.float64), np.frombuffer(second, np.float64))
+
+    def buffers(self) -> tuple[memoryview, memoryview]:
+        return memoryview(self.__first), memoryview(self.__second)
+
+    @classmethod
+    def from_arrow(
+        cls,
+        data: pa.Table | pa.RecordBatch,
+        first_column: str = "first",
+        second_column: str = "second",
+    ) -> "RightTrianglePairArray":
+        legs = []
+        for name in (first_column, second_column):
+            column = data.column(name)
+            if isinstance(column, pa.ChunkedArray):
+                # Копирование нужно только если столбец разбит на несколько частей.
+                column = (
+                    column.chunk(0)
+                    if column.num_chunks == 1
+                    else column.combine_chunks()
+                )
+            if column.null_count:
+                raise ValueError("Катеты должны быть положительными числами")
+            legs.append(column.to_numpy(zero_copy_only=column.type == pa.float64()))
+        return cls(*legs)
+
+    def to_arrow(self, include_hypotenuse: bool = True) -> pa.Table:
+        columns = {"first": pa.array(self.__first), "second": pa.array(self.__second)}
+        if include_hypotenuse:
+            columns["hypotenuse"] = pa.array(self.hypotenuse)
+        return pa.table(columns)
+
+    @classmethod
+    def from_pandas(
+        cls,
+        frame: pd.DataFrame,
+        first_column: str = "first",
+        second_column: str = "second",
+    ) -> "RightTrianglePairArray":
+        return cls(
+            frame[first_column].to_numpy(np.float64, copy=False),
+            frame[second_column].to_numpy(np.float64, copy=False),
+        )
+
+    def to_pandas(self, include_hypotenuse: bool = True) -> pd.DataFrame:
+        columns = {"first": self.__first, "second": self.__second}
+        if include_hypotenuse:
+            columns["hypotenuse"] = self.hypotenuse
+        return pd.DataFrame(columns, copy=False)
+
+    @property
+    def first(self) -> np.ndarray:
+        return self.__first
+
+    @property
+    def second(self) -> np.ndarray:
+        return self.__second
+
+    @property
+    def hypotenuse(self) -> np.ndarray:
+        return np.sqrt(self.__first**2 + self.__second**2)
+
+    def _legs(self, other) -> tuple[np.ndarray, np.ndarray] | None:
+        if isinstance(other, RightTrianglePairArray):
+            if len(other) != len(self):
+                raise ValueError("Массивы треугольников должны быть одной длины")
+            return other.first, other.second
+        if isinstance(other, RightTrianglePair):
+            return np.float64(other.first), np.float64(other.second)
+        return None
+
+    def _hypotenuse_of(self, other) -> np.ndarray | None:
+        if isinstance(other, RightTrianglePairArray):
+            if len(other) != len(self):
+                raise ValueError("Массивы треугольников должны быть одной длины")
+            return other.hypotenuse
+        if isinstance(other, RightTrianglePair):
+            return np.float64(other.hypotenuse)
+        return None
+
+    def __repr__(self) -> str:
+        return f"RightTrianglePairArray(n={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self.__first)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return RightTrianglePair(
+                float(self.__first[index]), float(self.__second[index])
+            )
+        return RightTrianglePairArray(self.__first[index], self.__second[index])
+
+    def __iter__(self) -> Iterator[RightTrianglePair]:
+        return iter(self.to_pairs())
+
+    def __eq__(self, other) -> np.ndarray:
+        legs = self._legs(other)
+        if legs is None:
+            return np.zeros(len(self), dtype=bool)
+        return (self.__first == legs[0]) & (self.__second == legs[1])
+
+    def __ne__(self, other) -> np.ndarray:
+        return ~(self == other)
+
+    def __lt__(self, other) -> np.ndarray:
+        hypotenuse = self._hypotenuse_of(other)
+        if hypotenuse is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.hypotenuse < hypotenuse
+
+    def __le__(self, other) -> np.ndarray:
+        hypotenuse = self._hypotenuse_of(other)
+        if hypotenuse is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.hypotenuse <= hypotenuse
+
+    def __gt__(self, other) -> np.ndarray:
+        hypotenuse = self._hypotenuse_of(other)
+        if hypotenuse is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.hypotenuse > hypotenuse
+
+    def __ge__(self, other) -> np.ndarray:
+        hypotenuse = self._hypotenuse_of(other)
+        if hypotenuse is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.hypotenuse >= hypotenuse
+
+    def __add__(self, other) -> "RightTrianglePairArray":
+        legs = self._legs(other)
+        if legs is None:
+            return None
+        return RightTrianglePairArray(self.__first + legs[0], self.__second + legs[1])
+
+    def __sub__(self, other) -> "RightTrianglePairArray":
+        legs = self._legs(other)
+        if legs is None:
+            return None
+        return RightTrianglePairArray(
+            np.maximum(0.1, self.__first - legs[0]),
+            np.maximum(0.1, self.__second - legs[1]),
+        )
+
+    def __mul__(self, other) -> "RightTrianglePairArray":
+        if isinstance(other, (int, float)):
+            return RightTrianglePairArray(self.__first * other, self.__second * other)
+        return None
+
+    def __truediv__(self, other) -> "RightTrianglePairArray":
+        if isinstance(other, (int, float)):
+            if other == 0:
+                raise ValueError("Деление на ноль")
+            return RightTrianglePairArray(self.__first / other, self.__second / other)
+        return None
+
+    def __radd__(self, other) -> "RightTrianglePairArray":
+        return self + other
+
+    def __rsub__(self, other) -> "RightTrianglePairArray":
+        if isinstance(other, (int, float)):
+            return RightTrianglePairArray(
+                np.maximum(0.1, other - self.__first),
+                np.maximum(0.1, other - self.__second),
+            )
+        return None
+
+    def __rmul__(self, other) -> "RightTrianglePairArray":
+        return self * other
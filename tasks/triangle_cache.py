@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+from typing import NamedTuple
+
+from triangle_model import RightTrianglePair
+
+
+class FrozenRightTrianglePair(RightTrianglePair):
+    """Неизменяемый треугольник: безопасно разделяется между вызывающими"""
+
+    __slots__ = ("__frozen",)
+
+    def __init__(self, first: float = 1, second: float = 1) -> None:
+        super().__init__(first, second)
+        self.__frozen = True
+
+    def __setattr__(self, name: str, value) -> None:
+        if name in ("first", "second") and getattr(
+            self, "_FrozenRightTrianglePair__frozen", False
+        ):
+            raise AttributeError("Треугольник неизменяем")
+        super().__setattr__(name, value)
+
+    # Составные присваивания создают новый объект, как у неизменяемых типов.
+    def __iadd__(self, other) -> RightTrianglePair:
+        return self + other
+
+    def __isub__(self, other) -> RightTrianglePair:
+        return self - other
+
+    def __imul__(self, other) -> RightTrianglePair:
+        return self * other
+
+    def __itruediv__(self, other) -> RightTrianglePair:
+        return self / other
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class TriangleInternCache:
+    """Ограниченный LRU-кэш общих неизменяемых треугольников по паре катетов"""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        if maxsize <= 0:
+            raise ValueError("Размер кэша должен быть положительным")
+        self.maxsize = maxsize
+        self._items: OrderedDict[tuple[float, float], FrozenRightTrianglePair] = (
+            OrderedDict()
+        )
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, first: float, second: float) -> FrozenRightTrianglePair:
+        key = (first, second)
+        triangle = self._items.get(key)
+        if triangle is not None:
+            self._items.move_to_end(key)
+            self._hits += 1
+            return triangle
+
+        # Проверка катетов выполняется только при промахе.
+        triangle = FrozenRightTrianglePair(first, second)
+        self._misses += 1
+        self._items[key] = triangle
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+            self._evictions += 1
+        return triangle
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            self._hits, self._misses, self._evictions, self.maxsize, len(self._items)
+        )
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._hits = self._misses = self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+_default_cache = TriangleInternCache()
+
+
+def make_interned_right_triangle_pair(
+    first: float, second: float
+) -> FrozenRightTrianglePair:
+    return _default_cache.get(first, second)
+
+
+def interned_cache_info() -> CacheInfo:
+    return _default_cache.info()
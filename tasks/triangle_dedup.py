@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from math import floor
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+from triangle_array import RightTrianglePairArray
+from triangle_model import RightTrianglePair
+
+
+class _ToleranceBuckets:
+    """Сетка с шагом tolerance: похожие катеты ищутся в соседних ячейках"""
+
+    def __init__(self, tolerance: float) -> None:
+        if tolerance <= 0:
+            raise ValueError("Допуск должен быть положительным")
+        self.tolerance = tolerance
+        self._cells: dict[tuple[int, int], list[tuple[float, float, int]]] = {}
+        self._count = 0
+
+    def find_or_add(self, first: float, second: float) -> tuple[int, bool]:
+        """Номер группы для катетов и признак того, что группа новая"""
+        tolerance = self.tolerance
+        x, y = floor(first / tolerance), floor(second / tolerance)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for rep_first, rep_second, group in self._cells.get(
+                    (x + dx, y + dy), ()
+                ):
+                    if (
+                        abs(rep_first - first) <= tolerance
+                        and abs(rep_second - second) <= tolerance
+                    ):
+                        return group, False
+        group = self._count
+        self._count += 1
+        self._cells.setdefault((x, y), []).append((first, second, group))
+        return group, True
+
+
+def deduplicate(
+    triangles: Iterable[RightTrianglePair], tolerance: float = 0.0
+) -> Iterator[RightTrianglePair]:
+    """Первые вхождения треугольников; при tolerance > 0 — с точностью до допуска"""
+    if tolerance:
+        buckets = _ToleranceBuckets(tolerance)
+        for triangle in triangles:
+            if buckets.find_or_add(triangle.first, triangle.second)[1]:
+                yield triangle
+        return
+
+    seen: set[RightTrianglePair] = set()
+    for triangle in triangles:
+        if triangle not in seen:
+            seen.add(triangle)
+            yield triangle
+
+
+def group_by(
+    triangles: Iterable[RightTrianglePair], tolerance: float = 0.0
+) -> dict[RightTrianglePair, list[RightTrianglePair]]:
+    """Группы равных (или близких) треугольников по первому представителю"""
+    groups: dict[RightTrianglePair, list[RightTrianglePair]] = {}
+    if tolerance:
+        buckets = _ToleranceBuckets(tolerance)
+        representatives: list[RightTrianglePair] = []
+        for triangle in triangles:
+            group, is_new = buckets.find_or_add(triangle.first, triangle.second)
+            if is_new:
+                representatives.append(triangle)
+                groups[triangle] = [triangle]
+            else:
+                groups[representatives[group]].append(triangle)
+        return groups
+
+    for triangle in triangles:
+        groups.setdefault(triangle, []).append(triangle)
+    return groups
+
+
+def group_labels(array: RightTrianglePairArray, tolerance: float = 0.0) -> np.ndarray:
+    """Номер группы для каждой строки массива в порядке первого появления"""
+    if tolerance:
+        buckets = _ToleranceBuckets(tolerance)
+        return np.fromiter(
+            (
+                buckets.find_or_add(first, second)[0]
+                for first, second in zip(array.first.tolist(), array.second.tolist())
+            ),
+            np.int64,
+            len(array),
+        )
+    frame = pd.DataFrame({"first": array.first, "second": array.second}, copy=False)
+    return frame.groupby(["first", "second"], sort=False).ngroup().to_numpy()
+
+
+def deduplicate_array(
+    array: RightTrianglePairArray, tolerance: float = 0.0
+) -> RightTrianglePairArray:
+    if tolerance:
+        labels = group_labels(array, tolerance)
+        first_rows = np.ones(len(labels), dtype=bool)
+        first_rows[1:] = labels[1:] > np.maximum.accumulate(labels)[:-1]
+        return array[first_rows]
+    frame = pd.DataFrame({"first": array.first, "second": array.second}, copy=False)
+    return array[~frame.duplicated(keep="first").to_numpy()]
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from itertools import count
+from random import random
+from typing import Iterable, Iterator
+
+from triangle_model import RightTrianglePair, _ObserverLink
+
+
+class _Node:
+    __slots__ = ("key", "triangle", "priority", "size", "left", "right")
+
+    def __init__(self, key: tuple[float, int], triangle: RightTrianglePair) -> None:
+        self.key = key
+        self.triangle = triangle
+        self.priority = random()
+        self.size = 1
+        self.left: _Node | None = None
+        self.right: _Node | None = None
+
+
+def _size(node: _Node | None) -> int:
+    return node.size if node is not None else 0
+
+
+def _split(node: _Node | None, key) -> tuple[_Node | None, _Node | None]:
+    """Делит дерево на ключи < key и >= key"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        node.size = 1 + _size(node.left) + _size(node.right)
+        return node, right
+    left, node.left = _split(node.left, key)
+    node.size = 1 + _size(node.left) + _size(node.right)
+    return left, node
+
+
+def _merge(left: _Node | None, right: _Node | None) -> _Node | None:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.size = 1 + _size(left.left) + _size(left.right)
+        return left
+    right.left = _merge(left, right.left)
+    right.size = 1 + _size(right.left) + _size(right.right)
+    return right
+
+
+def _insert(node: _Node | None, new: _Node) -> _Node:
+    if node is None:
+        return new
+    if new.priority > node.priority:
+        new.left, new.right = _split(node, new.key)
+        new.size = 1 + _size(new.left) + _size(new.right)
+        return new
+    if new.key < node.key:
+        node.left = _insert(node.left, new)
+    else:
+        node.right = _insert(node.right, new)
+    node.size += 1
+    return node
+
+
+def _delete(node: _Node | None, key) -> _Node | None:
+    if node.key == key:
+        return _merge(node.left, node.right)
+    if key < node.key:
+        node.left = _delete(node.left, key)
+    else:
+        node.right = _delete(node.right, key)
+    node.size -= 1
+    return node
+
+
+class TriangleIndex:
+    """Треугольники, упорядоченные по гипотенузе (декартово дерево с размерами)"""
+
+    def __init__(self, triangles: Iterable[RightTrianglePair] = ()) -> None:
+        self._link = _ObserverLink(self)
+        self._root: _Node | None = None
+        self._keys: dict[int, tuple[float, int]] = {}
+        self._sequence = count()
+        for triangle in triangles:
+            self.insert(triangle)
+
+    def __del__(self) -> None:
+        self._link.detach_all()
+
+    def insert(self, triangle: RightTrianglePair) -> None:
+        if id(triangle) in self._keys:
+            raise ValueError("Треугольник уже есть в индексе")
+        self._add(triangle)
+        self._link.attach(triangle)
+
+    def remove(self, triangle: RightTrianglePair) -> None:
+        if id(triangle) not in self._keys:
+            raise ValueError("Треугольник не найден в индексе")
+        self._discard(triangle)
+        self._link.detach(triangle)
+
+    def _add(self, triangle: RightTrianglePair) -> None:
+        key = (triangle.hypotenuse, next(self._sequence))
+        self._keys[id(triangle)] = key
+        self._root = _insert(self._root, _Node(key, triangle))
+
+    def _discard(self, triangle: RightTrianglePair) -> None:
+        self._root = _delete(self._root, self._keys.pop(id(triangle)))
+
+    # Вызываются сеттерами first/second, чтобы индекс оставался согласованным.
+    def _before_change(self, triangle: RightTrianglePair) -> None:
+        self._discard(triangle)
+
+    def _after_change(self, triangle: RightTrianglePair) -> None:
+        self._add(triangle)
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def __contains__(self, triangle: RightTrianglePair) -> bool:
+        return id(triangle) in self._keys
+
+    def __iter__(self) -> Iterator[RightTrianglePair]:
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.triangle
+            node = node.right
+
+    def range(self, low: float, high: float) -> list[RightTrianglePair]:
+        """Треугольники с гипотенузой в отрезке [low, high]"""
+        result: list[RightTrianglePair] = []
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left if node.key[0] >= low else None
+            node = stack.pop()
+            hypotenuse = node.key[0]
+            if hypotenuse > high:
+                break
+            if hypotenuse >= low:
+                result.append(node.triangle)
+            node = node.right
+        return result
+
+    def kth(self, k: int) -> RightTrianglePair:
+        """k-й по возрастанию гипотенузы треугольник (с нуля)"""
+        if not 0 <= k < len(self):
+            raise IndexError("Индекс вне диапазона")
+        node = self._root
+        while True:
+            left = _size(node.left)
+            if k < left:
+                node = node.left
+            elif k == left:
+                return node.triangle
+            else:
+                k -= left + 1
+                node = node.right
+
+    def rank(self, hypotenuse: float) -> int:
+        """Количество треугольников с гипотенузой меньше заданной"""
+        result, node = 0, self._root
+        while node is not None:
+            if node.key[0] < hypotenuse:
+                result += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return result
+
+    def nearest(self, hypotenuse: float) -> RightTrianglePair:
+        """Треугольник с ближайшей гипотенузой (при равенстве — меньший)"""
+        if self._root is None:
+            raise ValueError("Индекс пуст")
+        below = above = None
+        node = self._root
+        while node is not None:
+            if node.key[0] < hypotenuse:
+                below = node
+                node = node.right
+            else:
+                above = node
+                node = node.left
+        if above is None:
+            return below.triangle
+        if below is None:
+            return above.triangle
+        if hypotenuse - below.key[0] <= above.key[0] - hypotenuse:
+            return below.triangle
+        return above.triangle
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from math import gcd, isqrt
+from typing import Iterator
+
+from triangle_model import RightTrianglePair
+
+
+class IntegerRightTrianglePair(RightTrianglePair):
+    """Треугольник с целыми катетами и точными сравнениями по квадрату гипотенузы"""
+
+    __slots__ = ()
+
+    @staticmethod
+    def _coerce_leg(value: int) -> int:
+        if not isinstance(value, int):
+            value = float(value)
+            if not value.is_integer():
+                raise ValueError("Катеты должны быть целыми числами")
+            value = int(value)
+        if value <= 0:
+            raise ValueError("Катеты должны быть положительными числами")
+        return value
+
+    @property
+    def hypotenuse_squared(self) -> int:
+        return self.first * self.first + self.second * self.second
+
+    @property
+    def exact_hypotenuse(self) -> int | None:
+        """Целая гипотенуза, если она существует, иначе None"""
+        squared = self.hypotenuse_squared
+        root = isqrt(squared)
+        return root if root * root == squared else None
+
+    @property
+    def is_pythagorean(self) -> bool:
+        return self.exact_hypotenuse is not None
+
+    @property
+    def hypotenuse(self) -> float:
+        exact = self.exact_hypotenuse
+        return float(exact) if exact is not None else super().hypotenuse
+
+    def __str__(self) -> str:
+        return f"IntegerRightTrianglePair({self.first}, {self.second})"
+
+    def __repr__(self) -> str:
+        return str(self)
+
+    def __lt__(self, other) -> bool:
+        if isinstance(other, IntegerRightTrianglePair):
+            return self.hypotenuse_squared < other.hypotenuse_squared
+        return super().__lt__(other)
+
+    def __le__(self, other) -> bool:
+        if isinstance(other, IntegerRightTrianglePair):
+            return self.hypotenuse_squared <= other.hypotenuse_squared
+        return super().__le__(other)
+
+    def __gt__(self, other) -> bool:
+        if isinstance(other, IntegerRightTrianglePair):
+            return self.hypotenuse_squared > other.hypotenuse_squared
+        return super().__gt__(other)
+
+    def __ge__(self, other) -> bool:
+        if isinstance(other, IntegerRightTrianglePair):
+            return self.hypotenuse_squared >= other.hypotenuse_squared
+        return super().__ge__(other)
+
+    def __add__(self, other) -> RightTrianglePair:
+        if isinstance(other, IntegerRightTrianglePair):
+            return IntegerRightTrianglePair(
+                self.first + other.first, self.second + other.second
+            )
+        return super().__add__(other)
+
+    def __mul__(self, other) -> RightTrianglePair:
+        if isinstance(other, int):
+            return IntegerRightTrianglePair(self.first * other, self.second * other)
+        return super().__mul__(other)
+
+    def __rmul__(self, other) -> RightTrianglePair:
+        return self * other
+
+
+def pythagorean_triples(
+    limit: int, primitive_only: bool = False
+) -> Iterator[tuple[int, int, int]]:
+    """Тройки (a, b, c) с a < b и c <= limit по формуле Евклида"""
+    m = 2
+    while m * m + 1 <= limit:
+        # m и n разной чётности и взаимно просты — тройка примитивна.
+        for n in range(1 if m % 2 == 0 else 2, m, 2):
+            c = m * m + n * n
+            if c > limit:
+                break
+            if gcd(m, n) != 1:
+                continue
+            a, b = m * m - n * n, 2 * m * n
+            if a > b:
+                a, b = b, a
+            if primitive_only:
+                yield a, b, c
+            else:
+                for k in range(1, limit // c + 1):
+                    yield k * a, k * b, k * c
+        m += 1
+
+
+def pythagorean_table(
+    limit: int, primitive_only: bool = False
+) -> list[IntegerRightTrianglePair]:
+    """Треугольники с целой гипотенузой до limit, по возрастанию гипотенузы"""
+    triples = sorted(
+        pythagorean_triples(limit, primitive_only), key=lambda t: (t[2], t[0])
+    )
+    return [IntegerRightTrianglePair(a, b) for a, b, _ in triples]
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from typing import Iterator
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+from triangle_array import RightTrianglePairArray
+from triangle_model import RightTrianglePair
+
+DEFAULT_CHUNK_SIZE = 65_536
+
+_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+    ".arrows": "arrow_stream",
+}
+
+
+def _detect_format(path: Path) -> str:
+    try:
+        return _FORMATS[path.suffix.lower()]
+    except KeyError:
+        raise ValueError(f"Неизвестный формат файла: {path.suffix}") from None
+
+
+def _read_record_batches(
+    path: Path, file_format: str, columns: list[str], chunk_size: int
+) -> Iterator[pa.RecordBatch]:
+    if file_format == "csv":
+        reader = pa_csv.open_csv(
+            path,
+            # Около 64 байт на строку: блок чтения соизмерим с размером порции.
+            read_options=pa_csv.ReadOptions(block_size=max(chunk_size * 64, 1 << 16)),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=columns,
+                column_types={name: pa.float64() for name in columns},
+            ),
+        )
+        yield from reader
+    elif file_format == "parquet":
+        yield from pq.ParquetFile(path).iter_batches(
+            batch_size=chunk_size, columns=columns
+        )
+    elif file_format == "arrow":
+        with pa.memory_map(str(path)) as source:
+            reader = pa_ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+    elif file_format == "arrow_stream":
+        with pa.memory_map(str(path)) as source:
+            yield from pa_ipc.open_stream(source)
+    else:
+        raise ValueError(f"Неизвестный формат файла: {file_format}")
+
+
+def _to_array(batch: pa.RecordBatch, first: str, second: str) -> RightTrianglePairArray:
+    legs = []
+    for name in (first, second):
+        index = batch.schema.get_field_index(name)
+        if index < 0:
+            raise ValueError(f"Столбец не найден: {name}")
+        column = batch.column(index)
+        if column.null_count:
+            raise ValueError("Катеты должны быть положительными числами")
+        legs.append(column.cast(pa.float64()).to_numpy(zero_copy_only=False))
+    return RightTrianglePairArray(*legs)
+
+
+def iter_triangle_batches(
+    path: str | Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    first_column: str = "first",
+    second_column: str = "second",
+    file_format: str | None = None,
+) -> Iterator[RightTrianglePairArray]:
+    """Потоковое чтение катетов из CSV/Parquet/Arrow порциями не длиннее chunk_size"""
+    if chunk_size <= 0:
+        raise ValueError("Размер порции должен быть положительным")
+    path = Path(path)
+    file_format = file_format or _detect_format(path)
+    columns = [first_column, second_column]
+
+    for batch in _read_record_batches(path, file_format, columns, chunk_size):
+        for offset in range(0, batch.num_rows, chunk_size):
+            yield _to_array(
+                batch.slice(offset, chunk_size), first_column, second_column
+            )
+
+
+def iter_triangles(
+    path: str | Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    first_column: str = "first",
+    second_column: str = "second",
+    file_format: str | None = None,
+) -> Iterator[RightTrianglePair]:
+    """Потоковое чтение треугольников по одному объекту RightTrianglePair"""
+    for batch in iter_triangle_batches(
+        path, chunk_size, first_column, second_column, file_format
+    ):
+        yield from batch
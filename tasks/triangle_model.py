@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import weakref
 from math import sqrt
 
 
 class RightTrianglePair:
+    __slots__ = ("__first", "__second", "__hypotenuse", "__observers")
+
     def __init__(self, first: float = 1, second: float = 1) -> None:
+        self.__observers = None
         self.first = first
         self.second = second
 
@@ -15,10 +19,13 @@ class RightTrianglePair:
 
     @first.setter
     def first(self, value: float) -> None:
-        value = float(value)
-        if value <= 0:
-            raise ValueError("Катеты должны быть положительными числами")
+        value = self._coerce_leg(value)
+        if self.__observers:
+            self.__notify("_before_change")
         self.__first = value
+        self.__hypotenuse = None
+        if self.__observers:
+            self.__notify("_after_change")
 
     @property
     def second(self) -> float:
@@ -26,10 +33,38 @@ class RightTrianglePair:
 
     @second.setter
     def second(self, value: float) -> None:
+        value = self._coerce_leg(value)
+        if self.__observers:
+            self.__notify("_before_change")
+        self.__second = value
+        self.__hypotenuse = None
+        if self.__observers:
+            self.__notify("_after_change")
+
+    @staticmethod
+    def _coerce_leg(value: float) -> float:
         value = float(value)
         if value <= 0:
             raise ValueError("Катеты должны быть положительными числами")
-        self.__second = value
+        return value
+
+    def _attach_observer(self, observer) -> None:
+        if self.__observers is None:
+            self.__observers = []
+        self.__observers.append(observer)
+
+    def _detach_observer(self, observer) -> None:
+        self.__observers.remove(observer)
+        if not self.__observers:
+            self.__observers = None
+
+    def __notify(self, event: str) -> None:
+        # Наблюдатели (например, TriangleIndex) узнают об изменении катетов.
+        for observer in self.__observers:
+            getattr(observer, event)(self)
+
+    def __reduce__(self):
+        return type(self), (self.first, self.second)
 
     def edit(self) -> None:
         """Редактирование катетов через консоль"""
@@ -38,7 +73,10 @@ class RightTrianglePair:
 
     @property
     def hypotenuse(self) -> float:
-        return sqrt(self.first**2 + self.second**2)
+        # Гипотенуза кэшируется и сбрасывается при изменении любого катета.
+        if self.__hypotenuse is None:
+            self.__hypotenuse = sqrt(self.first**2 + self.second**2)
+        return self.__hypotenuse
 
     def __str__(self) -> str:
         return (
@@ -60,6 +98,10 @@ class RightTrianglePair:
     def __ne__(self, other) -> bool:
         return not self == other
 
+    def __hash__(self) -> int:
+        # Согласован с __eq__; не меняйте катеты у объекта, лежащего в set/dict.
+        return hash((self.first, self.second))
+
     def __lt__(self, other) -> bool:
         if isinstance(other, RightTrianglePair):
             return self.hypotenuse < other.hypotenuse
@@ -182,3 +224,40 @@ class RightTrianglePair:
 
 def make_right_triangle_pair(first: float, second: float) -> RightTrianglePair:
     return RightTrianglePair(first, second)
+
+
+class _ObserverLink:
+    """Подписка индекса на треугольники, не удерживающая сам индекс.
+
+    Иначе треугольник держал бы все временные индексы, в которые попадал;
+    владелец снимает ссылку со всех треугольников в своём __del__.
+    """
+
+    __slots__ = ("_observer", "_triangles")
+
+    def __init__(self, observer) -> None:
+        self._observer = weakref.ref(observer)
+        self._triangles: dict[int, RightTrianglePair] = {}
+
+    def attach(self, triangle: RightTrianglePair) -> None:
+        self._triangles[id(triangle)] = triangle
+        triangle._attach_observer(self)
+
+    def detach(self, triangle: RightTrianglePair) -> None:
+        del self._triangles[id(triangle)]
+        triangle._detach_observer(self)
+
+    def detach_all(self) -> None:
+        for triangle in self._triangles.values():
+            triangle._detach_observer(self)
+        self._triangles.clear()
+
+    def _before_change(self, triangle: RightTrianglePair) -> None:
+        observer = self._observer()
+        if observer is not None:
+            observer._before_change(triangle)
+
+    def _after_change(self, triangle: RightTrianglePair) -> None:
+        observer = self._observer()
+        if observer is not None:
+            observer._after_change(triangle)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from math import sqrt
+from typing import Callable, Iterator, NamedTuple, Sequence
+
+from triangle_array import RightTrianglePairArray
+from triangle_model import RightTrianglePair
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+Chunk = tuple[int, list[float], list[float]]
+
+
+class HypotenuseStats(NamedTuple):
+    count: int
+    total: float
+    minimum: float
+    maximum: float
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count
+
+
+def _chunks(
+    triangles: Sequence[RightTrianglePair] | RightTrianglePairArray, chunk_size: int
+) -> Iterator[Chunk]:
+    for offset in range(0, len(triangles), chunk_size):
+        stop = offset + chunk_size
+        part = triangles[offset:stop]
+        if isinstance(part, RightTrianglePairArray):
+            yield offset, part.first.tolist(), part.second.tolist()
+        else:
+            yield offset, [t.first for t in part], [t.second for t in part]
+
+
+def _check(
+    triangles: Sequence[RightTrianglePair] | RightTrianglePairArray, chunk_size: int
+) -> None:
+    if chunk_size <= 0:
+        raise ValueError("Размер порции должен быть положительным")
+    if not len(triangles):
+        raise ValueError("Коллекция треугольников пуста")
+
+
+def _map_chunks(
+    function: Callable[[Chunk], object],
+    triangles: Sequence[RightTrianglePair] | RightTrianglePairArray,
+    chunk_size: int,
+    max_workers: int | None,
+) -> list:
+    _check(triangles, chunk_size)
+    chunks = _chunks(triangles, chunk_size)
+    # Одна порция не стоит запуска пула процессов.
+    if len(triangles) <= chunk_size or max_workers == 1:
+        return [function(chunk) for chunk in chunks]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(function, chunks))
+
+
+def _hypotenuses(chunk: Chunk) -> list[float]:
+    _, firsts, seconds = chunk
+    return [sqrt(a**2 + b**2) for a, b in zip(firsts, seconds)]
+
+
+def _scale_chunk(chunk: Chunk, factor: float) -> list[RightTrianglePair]:
+    _, firsts, seconds = chunk
+    return [RightTrianglePair(a * factor, b * factor) for a, b in zip(firsts, seconds)]
+
+
+def _min_chunk(chunk: Chunk) -> tuple[float, int]:
+    values = _hypotenuses(chunk)
+    position = min(range(len(values)), key=values.__getitem__)
+    return values[position], chunk[0] + position
+
+
+def _max_chunk(chunk: Chunk) -> tuple[float, int]:
+    values = _hypotenuses(chunk)
+    position = max(range(len(values)), key=values.__getitem__)
+    return values[position], chunk[0] + position
+
+
+def _stats_chunk(chunk: Chunk) -> HypotenuseStats:
+    values = _hypotenuses(chunk)
+    return HypotenuseStats(len(values), sum(values), min(values), max(values))
+
+
+def parallel_sum(
+    triangles: Sequence[RightTrianglePair] | RightTrianglePairArray,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: int | None = None,
+) -> RightTrianglePair:
+    """Аналог reduce(operator.add, triangles), совпадающий с ним побитово.
+
+    Сложение — одна свёртка слева направо в текущем процессе: суммы порций,
+    сложенные отдельно, расходятся с reduce в последних битах, а n сложений
+    дешевле пересылки порций в процессы. max_workers оставлен для единообразия.
+    """
+    _check(triangles, chunk_size)
+    # Не встроенный sum(): с 3.12 он суммирует с компенсацией.
+    first = second = 0.0
+    for _, firsts, seconds in _chunks(triangles, chunk_size):
+        for a, b in zip(firsts, seconds):
+            first += a
+            second += b
+    return RightTrianglePair(first, second)
+
+
+def parallel_scale(
+    triangles: Sequence[RightTrianglePair] | RightTrianglePairArray,
+    factor: float,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: int | None = None,
+) -> list[RightTrianglePair]:
+    """Аналог [t * factor for t in triangles]"""
+    if not isinstance(factor, (int, float)):
+        raise TypeError("Множитель должен быть числом")
+    parts = _map_chunks(
+        partial(_scale_chunk, factor=factor), triangles, chunk_size, max_workers
+    )
+    return [triangle for part in parts for triangle in part]
+
+
+def parallel_min(
+    triangles: Sequence[RightTrianglePair] | RightTrianglePairArray,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: int | None = None,
+) -> RightTrianglePair:
+    """Аналог min(triangles): первый треугольник с наименьшей гипотенузой"""
+    results = _map_chunks(_min_chunk, triangles, chunk_size, max_workers)
+    return triangles[min(results)[1]]
+
+
+def parallel_max(
+    triangles: Sequence[RightTrianglePair] | RightTrianglePairArray,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: int | None = None,
+) -> RightTrianglePair:
+    """Аналог max(triangles): первый треугольник с наибольшей гипотенузой"""
+    results = _map_chunks(_max_chunk, triangles, chunk_size, max_workers)
+    return triangles[max(results, key=lambda item: (item[0], -item[1]))[1]]
+
+
+def parallel_hypotenuse_stats(
+    triangles: Sequence[RightTrianglePair] | RightTrianglePairArray,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_workers: int | None = None,
+) -> HypotenuseStats:
+    partials = _map_chunks(_stats_chunk, triangles, chunk_size, max_workers)
+    total = partials[0].total
+    for stats in partials[1:]:
+        total += stats.total
+    return HypotenuseStats(
+        sum(stats.count for stats in partials),
+        total,
+        min(stats.minimum for stats in partials),
+        max(stats.maximum for stats in partials),
+    )
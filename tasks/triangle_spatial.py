@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from heapq import nsmallest
+from math import floor, hypot, sqrt
+from typing import Iterable
+
+import numpy as np
+from triangle_array import RightTrianglePairArray
+from triangle_model import RightTrianglePair, _ObserverLink
+
+Cell = tuple[int, int]
+
+
+def _cells(values: np.ndarray, cell_size: float) -> list[int]:
+    """Номера ячеек по одной оси — те же, что дал бы floor(value / cell_size)"""
+    scaled = np.floor(values / cell_size)
+    if scaled.size and np.abs(scaled).max() >= 2**62:
+        # Вне диапазона int64: переводим в целые Python, как _cell_of.
+        return [int(value) for value in scaled.tolist()]
+    return scaled.astype(np.int64).tolist()
+
+
+class TriangleGrid:
+    """Равномерная сетка на плоскости катетов для поиска ближайших треугольников"""
+
+    def __init__(self, cell_size: float = 1.0) -> None:
+        if cell_size <= 0:
+            raise ValueError("Размер ячейки должен быть положительным")
+        self.cell_size = float(cell_size)
+        self._link = _ObserverLink(self)
+        self._cells: dict[Cell, list[RightTrianglePair]] = {}
+        self._locations: dict[int, Cell] = {}
+        self._bounds: tuple[int, int, int, int] | None = None
+
+    def __del__(self) -> None:
+        self._link.detach_all()
+
+    @classmethod
+    def from_triangles(
+        cls,
+        triangles: Iterable[RightTrianglePair] | RightTrianglePairArray,
+        cell_size: float | None = None,
+    ) -> "TriangleGrid":
+        if not isinstance(triangles, RightTrianglePairArray):
+            triangles = list(triangles)
+            array = RightTrianglePairArray.from_pairs(triangles)
+        else:
+            array, triangles = triangles, triangles.to_pairs()
+
+        if cell_size is None:
+            cell_size = cls._suggest_cell_size(array)
+        grid = cls(cell_size)
+        xs = _cells(array.first, grid.cell_size)
+        ys = _cells(array.second, grid.cell_size)
+        for triangle, x, y in zip(triangles, xs, ys):
+            grid._place(triangle, (x, y))
+        return grid
+
+    @staticmethod
+    def _suggest_cell_size(array: RightTrianglePairArray) -> float:
+        # Около двух треугольников на ячейку для равномерных данных.
+        if len(array) < 2:
+            return 1.0
+        width = float(array.first.max() - array.first.min())
+        height = float(array.second.max() - array.second.min())
+        extent = max(width, height)
+        magnitude = float(max(array.first.max(), array.second.max()))
+        if extent <= magnitude * 1e-9:
+            # Точки практически совпадают: разбивать нечего.
+            return 1.0
+        return sqrt(2 * extent**2 / len(array))
+
+    def _cell_of(self, first: float, second: float) -> Cell:
+        return floor(first / self.cell_size), floor(second / self.cell_size)
+
+    def _place(self, triangle: RightTrianglePair, cell: Cell) -> None:
+        if id(triangle) in self._locations:
+            raise ValueError("Треугольник уже есть в индексе")
+        self._add(triangle, cell)
+        self._link.attach(triangle)
+
+    def _add(self, triangle: RightTrianglePair, cell: Cell) -> None:
+        self._cells.setdefault(cell, []).append(triangle)
+        self._locations[id(triangle)] = cell
+        x, y = cell
+        if self._bounds is None:
+            self._bounds = (x, x, y, y)
+        else:
+            min_x, max_x, min_y, max_y = self._bounds
+            self._bounds = (min(min_x, x), max(max_x, x), min(min_y, y), max(max_y, y))
+
+    def insert(self, triangle: RightTrianglePair) -> None:
+        self._place(triangle, self._cell_of(triangle.first, triangle.second))
+
+    def remove(self, triangle: RightTrianglePair) -> None:
+        if id(triangle) not in self._locations:
+            raise ValueError("Треугольник не найден в индексе")
+        self._discard(triangle)
+        self._link.detach(triangle)
+
+    def _discard(self, triangle: RightTrianglePair) -> None:
+        cell = self._locations.pop(id(triangle))
+        bucket = self._cells[cell]
+        # Равные треугольники могут лежать в одной ячейке: ищем именно этот объект.
+        for i, item in enumerate(bucket):
+            if item is triangle:
+                del bucket[i]
+                break
+        if not bucket:
+            del self._cells[cell]
+
+    # Вызываются сеттерами first/second, чтобы сетка оставалась согласованной.
+    def _before_change(self, triangle: RightTrianglePair) -> None:
+        self._discard(triangle)
+
+    def _after_change(self, triangle: RightTrianglePair) -> None:
+        self._add(triangle, self._cell_of(triangle.first, triangle.second))
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, triangle: RightTrianglePair) -> bool:
+        return id(triangle) in self._locations
+
+    def _ring(self, center: Cell, radius: int) -> Iterable[list[RightTrianglePair]]:
+        cx, cy = center
+        if radius == 0:
+            bucket = self._cells.get(center)
+            return [bucket] if bucket else []
+        buckets = []
+        for x in range(cx - radius, cx + radius + 1):
+            for y in (cy - radius, cy + radius):
+                bucket = self._cells.get((x, y))
+                if bucket:
+                    buckets.append(bucket)
+        for y in range(cy - radius + 1, cy + radius):
+            for x in (cx - radius, cx + radius):
+                bucket = self._cells.get((x, y))
+                if bucket:
+                    buckets.append(bucket)
+        return buckets
+
+    def _radius_range(self, center: Cell) -> tuple[int, int]:
+        # Кольца ближе границ занятой области и дальше них заведомо пусты.
+        min_x, max_x, min_y, max_y = self._bounds
+        cx, cy = center
+        return (
+            max(min_x - cx, cx - max_x, min_y - cy, cy - max_y, 0),
+            max(cx - min_x, max_x - cx, cy - min_y, max_y - cy, 0),
+        )
+
+    def nearest(
+        self, first: float, second: float, k: int = 1
+    ) -> list[RightTrianglePair]:
+        """k ближайших по катетам треугольников, по возрастанию расстояния"""
+        if k <= 0 or not self._locations:
+            return []
+        center = self._cell_of(first, second)
+        cx, cy = center
+        radius, max_radius = self._radius_range(center)
+        candidates: list[tuple[float, int, RightTrianglePair]] = []
+
+        def collect(buckets: Iterable[list[RightTrianglePair]]) -> None:
+            for bucket in buckets:
+                for triangle in bucket:
+                    distance = hypot(triangle.first - first, triangle.second - second)
+                    candidates.append((distance, len(candidates), triangle))
+
+        while radius <= max_radius:
+            if 8 * radius > len(self._cells):
+                # Кольцо длиннее числа занятых ячеек: досматриваем занятые напрямую.
+                collect(
+                    bucket
+                    for (x, y), bucket in self._cells.items()
+                    if max(abs(x - cx), abs(y - cy)) >= radius
+                )
+                break
+            collect(self._ring(center, radius))
+            # Все ещё не просмотренные точки дальше radius * cell_size.
+            if len(candidates) >= k:
+                best = nsmallest(k, candidates)
+                if best[-1][0] <= radius * self.cell_size:
+                    return [triangle for _, _, triangle in best]
+            radius += 1
+        return [triangle for _, _, triangle in nsmallest(k, candidates)]
+
+    def within(
+        self, first: float, second: float, radius: float
+    ) -> list[RightTrianglePair]:
+        """Треугольники на расстоянии не больше radius, по возрастанию расстояния"""
+        if radius < 0:
+            raise ValueError("Радиус не может быть отрицательным")
+        min_x, min_y = self._cell_of(first - radius, second - radius)
+        max_x, max_y = self._cell_of(first + radius, second + radius)
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self._cells):
+            # Круг накрывает больше ячеек, чем занято: обходим только занятые.
+            buckets = [
+                bucket
+                for (x, y), bucket in self._cells.items()
+                if min_x <= x <= max_x and min_y <= y <= max_y
+            ]
+        else:
+            buckets = [
+                self._cells[(x, y)]
+                for x in range(min_x, max_x + 1)
+                for y in range(min_y, max_y + 1)
+                if (x, y) in self._cells
+            ]
+        found: list[tuple[float, int, RightTrianglePair]] = []
+        for bucket in buckets:
+            for triangle in bucket:
+                distance = hypot(triangle.first - first, triangle.second - second)
+                if distance <= radius:
+                    found.append((distance, len(found), triangle))
+        return [triangle for _, _, triangle in sorted(found)]
@@ -1,11 +1,64 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from datetime import datetime, timedelta
-
+import asyncio
+import io
+import json
+import operator
+import random
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from functools import reduce
+from math import hypot, sqrt
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
+from library_package import library_model
+from library_package.book_search import BookSearchIndex, tokenize
+from library_package.concurrent_subscriber import (
+    ConcurrentSubscriber,
+    LockStripes,
+    transfer_book,
+)
+from library_package.debt_aging import DebtAging
+from library_package.due_date_index import DueDateIndex
+from library_package.library_ledger import (
+    iter_ledger_batches,
+    ledger_frame,
+    ledger_table,
+    subscribers_from_ledger,
+)
 from library_package.library_model import Book, BorrowedBook, Debt, Subscriber
+from library_package.library_registry import Library
+from library_package.library_service import LibraryService
+from library_package.library_storage import SQLiteLibraryStore
+from triangle_array import RightTrianglePairArray
+from triangle_cache import (
+    FrozenRightTrianglePair,
+    TriangleInternCache,
+    interned_cache_info,
+    make_interned_right_triangle_pair,
+)
+from triangle_dedup import deduplicate, deduplicate_array, group_by, group_labels
+from triangle_index import TriangleIndex
+from triangle_integer import (
+    IntegerRightTrianglePair,
+    pythagorean_table,
+    pythagorean_triples,
+)
+from triangle_loader import iter_triangle_batches, iter_triangles
 from triangle_model import RightTrianglePair, make_right_triangle_pair
+from triangle_parallel import (
+    parallel_hypotenuse_stats,
+    parallel_max,
+    parallel_min,
+    parallel_scale,
+    parallel_sum,
+)
+from triangle_spatial import TriangleGrid
 
 
 class TestRightTrianglePair:
@@ -153,6 +206,26 @@ class TestRightTrianglePair:
         assert t1.first == 6
         assert t1.second == 8
 
+    def test_slots_without_dict(self):
+        t1 = RightTrianglePair(3, 4)
+        assert not hasattr(t1, "__dict__")
+
+    def test_hypotenuse_cache_invalidation(self):
+        t1 = RightTrianglePair(3, 4)
+        assert t1.hypotenuse == 5.0
+        t1.second = 12
+        assert t1.hypotenuse == sqrt(9 + 144)
+        t1 *= 2
+        assert t1.hypotenuse == sqrt(36 + 576)
+        t1 -= RightTrianglePair(3, 21)
+        assert t1.hypotenuse == sqrt(9 + 9)
+
+    def test_hash_consistent_with_eq(self):
+        t1 = RightTrianglePair(3, 4)
+        t2 = RightTrianglePair(3.0, 4.0)
+        assert hash(t1) == hash(t2)
+        assert len({t1, t2, RightTrianglePair(4, 3)}) == 2
+
 
 class TestMakeRightTrianglePair:
     def test_make_function(self):
@@ -237,6 +310,19 @@ class TestLibraryModel:
         assert len(subscriber) == 0
         assert subscriber.count == 0
 
+    def test_remove_book_changed_after_issue(self):
+        subscriber = Subscriber("Иванов", "LIB001", 5)
+        book = Book("Автор", "Книга", 2024, "Издательство", 100.0)
+        subscriber.add_book(book)
+
+        book.title = "Новое название"
+        assert book in subscriber
+        assert Book("Автор", "Книга", 2024, "Издательство", 100.0) not in subscriber
+        subscriber.remove_book(book)
+        assert len(subscriber) == 0
+        with pytest.raises(ValueError, match="не найдена"):
+            subscriber.remove_book(book)
+
     def test_subscriber_getitem(self):
         subscriber = Subscriber("Иванов", "LIB001", 5)
         book = Book("Автор", "Книга", 2024, "Издательство", 100.0)
@@ -361,3 +447,1424 @@ class TestLibraryModel:
         assert debt.library_id == "LIB001"
         assert len(debt.overdue_books) == 1
         assert debt.total_cost == 100.0
+
+    @staticmethod
+    def scan(subscriber, predicate):
+        return [borrowed for borrowed in subscriber._books if predicate(borrowed.book)]
+
+    def test_subscriber_find_indexes_match_scan(self):
+        subscriber = Subscriber("Иванов", "LIB001", 10)
+        books = [
+            Book("Толстой", "Книга1", 1869, "Эксмо", 100.0),
+            Book("Пушкин", "Книга2", 1833, "АСТ", 200.0),
+            Book("толстой", "Книга3", 1833, "эксмо", 300.0),
+            Book("Гоголь", "Книга4", 1869, "Дрофа", 400.0),
+        ]
+        for book in books:
+            subscriber.add_book(book)
+        subscriber.remove_book(books[1])
+        replacement = BorrowedBook(Book("ТОЛСТОЙ", "Книга5", 1833, "АСТ", 50.0))
+        subscriber[0] = replacement
+
+        assert subscriber.find_by_author("Толстой") == self.scan(
+            subscriber, lambda book: book.author.lower() == "толстой"
+        )
+        assert [b.book.title for b in subscriber.find_by_author("ТОЛСТОЙ")] == [
+            "Книга5",
+            "Книга3",
+        ]
+        assert subscriber.find_by_publisher("ЭКСМО") == [subscriber[1]]
+        assert subscriber.find_by_year(1833) == [subscriber[0], subscriber[1]]
+        assert subscriber.find_by_year(1900) == []
+
+    def test_subscriber_operators_keep_indexes(self):
+        sub1 = Subscriber("Иванов", "LIB001", 10)
+        sub2 = Subscriber("Иванов", "LIB001", 10)
+        book1 = Book("Автор1", "Книга1", 2024, "Издательство", 100.0)
+        book2 = Book("Автор2", "Книга2", 2023, "Издательство", 200.0)
+        sub1.add_book(book1)
+        sub2.add_book(book2)
+
+        assert len((sub1 + sub2).find_by_publisher("издательство")) == 2
+        assert (sub1 - sub2).find_by_year(2024)[0].book == book1
+        assert (sub1 & sub2).find_by_author("Автор1") == []
+
+    def test_subscriber_union_all_matches_pairwise(self):
+        books = [Book(f"Автор{i}", f"Книга{i}", 2024, "Изд", 100.0) for i in range(6)]
+        cards = [Subscriber("Иванов", "LIB001", size) for size in (3, 2, 5)]
+        for card, part in zip(cards, (books[:3], books[2:4], books[1:6])):
+            for book in part:
+                card.add_book(book)
+        cards[1][0] = cards[0][2]
+
+        expected = reduce(operator.add, cards)
+        result = Subscriber.union_all(cards)
+        assert result._books == expected._books
+        assert (result.size, result.count) == (expected.size, expected.count)
+        with pytest.raises(ValueError, match="Нужна хотя бы одна карточка"):
+            Subscriber.union_all([])
+
+    def test_subscriber_intersect_all_matches_pairwise(self):
+        books = [Book(f"Автор{i}", f"Книга{i}", 2024, "Изд", 100.0) for i in range(6)]
+        cards = [Subscriber(f"Абонент{i}", f"LIB00{i}", 10) for i in range(3)]
+        for card, part in zip(cards, (books, books[1:5], books[2:])):
+            for book in part:
+                card.add_book(book)
+
+        expected = reduce(operator.and_, cards)
+        result = Subscriber.intersect_all(cards)
+        assert result._books == expected._books
+        assert result.name == expected.name == "Абонент0 & Абонент1 & Абонент2"
+
+    def test_book_compact_hash(self):
+        book = Book("Автор", "Книга", 2024, "Издательство", 100.0)
+        assert not hasattr(book, "__dict__")
+        original = hash(book)
+        assert hash(book) == original
+        book.price = 150.0
+        assert hash(book) == hash(Book("Автор", "Книга", 2024, "Издательство", 150.0))
+
+    def test_book_interned_strings(self):
+        book1 = Book("".join(["Авт", "ор"]), "Книга1", 2024, "Изд", 100.0)
+        book2 = Book("".join(["Ав", "тор"]), "Книга2", 2024, "Изд", 100.0)
+        assert book1.author is book2.author
+
+    def test_borrowed_book_dates(self):
+        book = Book("Автор", "Книга", 2024, "Издательство", 100.0)
+        borrowed = BorrowedBook(book, "2024-01-15")
+        assert not hasattr(borrowed, "__dict__")
+        assert borrowed.issue_date == "2024-01-15"
+        assert borrowed.return_date == "2024-02-14"
+        assert str(borrowed) == (
+            "'Книга' by Автор (2024) - выдана: 2024-01-15, "
+            "вернуть до: 2024-02-14 [не возвращена] (просрочена)"
+        )
+        today = BorrowedBook(book)
+        assert today.issue_date == datetime.now().strftime("%Y-%m-%d")
+        assert not today.is_overdue()
+
+    def test_borrowed_book_bulk_matches_single(self):
+        book = Book("Автор", "Книга", 2024, "Издательство", 100.0)
+        dates = ["2024-01-01", "2024-12-15", "2024-01-01", ""]
+        bulk = BorrowedBook.bulk((book, issue_date) for issue_date in dates)
+        single = [BorrowedBook(book, issue_date) for issue_date in dates]
+        assert [str(b) for b in bulk] == [str(b) for b in single]
+        assert [b.return_date for b in bulk] == [b.return_date for b in single]
+        with pytest.raises(ValueError):
+            BorrowedBook.bulk([(book, "01.01.2024")])
+
+    def test_subscriber_add_books(self):
+        books = [Book(f"Автор{i}", f"Книга{i}", 2024, "Изд", 100.0) for i in range(3)]
+        subscriber = Subscriber("Иванов", "LIB001", 2)
+        with pytest.raises(ValueError, match="Достигнут лимит книг: 2"):
+            subscriber.add_books((book, "2024-01-01") for book in books)
+        assert subscriber.count == len(subscriber) == 2
+        assert subscriber.find_by_author("Автор1")[0].return_date == "2024-01-31"
+
+
+class TestRightTrianglePairArray:
+    def test_round_trip_pairs(self):
+        pairs = [RightTrianglePair(3, 4), RightTrianglePair(5, 12)]
+        array = RightTrianglePairArray.from_pairs(pairs)
+        assert len(array) == 2
+        assert array.to_pairs() == pairs
+        assert array[1] == RightTrianglePair(5, 12)
+
+    def test_hypotenuse_matches_scalar(self):
+        pairs = [RightTrianglePair(a, b) for a, b in [(3, 4), (1.5, 2.25), (7, 0.3)]]
+        array = RightTrianglePairArray.from_pairs(pairs)
+        assert array.hypotenuse.tolist() == [t.hypotenuse for t in pairs]
+
+    def test_invalid_legs(self):
+        with pytest.raises(
+            ValueError, match="Катеты должны быть положительными числами"
+        ):
+            RightTrianglePairArray([3, -1], [4, 4])
+
+    def test_arithmetic(self):
+        array = RightTrianglePairArray([5, 1], [6, 2])
+        other = RightTrianglePairArray([1, 2], [2, 1])
+        assert (array + other).to_pairs() == [
+            RightTrianglePair(6, 8),
+            RightTrianglePair(3, 3),
+        ]
+        assert (array - other).to_pairs() == [
+            RightTrianglePair(4, 4),
+            RightTrianglePair(0.1, 1),
+        ]
+        assert (array * 2).first.tolist() == [10, 2]
+        assert (array / 2).second.tolist() == [3, 1]
+        with pytest.raises(ValueError, match="Деление на ноль"):
+            array / 0
+
+    def test_comparisons(self):
+        array = RightTrianglePairArray([3, 5], [4, 12])
+        pivot = RightTrianglePair(6, 8)
+        assert (array < pivot).tolist() == [True, False]
+        assert (array >= pivot).tolist() == [False, True]
+        assert (array == RightTrianglePair(3, 4)).tolist() == [True, False]
+
+    def test_buffers_zero_copy(self):
+        array = RightTrianglePairArray([3, 5], [4, 12])
+        first, second = array.buffers()
+        assert first.format == "d" and first.nbytes == 16
+        view = RightTrianglePairArray.from_buffers(first, second)
+        assert np.shares_memory(view.first, array.first)
+        assert view.hypotenuse.tolist() == [5.0, 13.0]
+
+    def test_arrow_round_trip(self):
+        array = RightTrianglePairArray([3, 5], [4, 12])
+        table = array.to_arrow()
+        assert table.column_names == ["first", "second", "hypotenuse"]
+        assert table.column("hypotenuse").to_pylist() == [5.0, 13.0]
+        restored = RightTrianglePairArray.from_arrow(table)
+        assert np.shares_memory(restored.first, array.first)
+        assert restored.to_pairs() == array.to_pairs()
+
+    def test_pandas_round_trip(self):
+        array = RightTrianglePairArray([3, 5], [4, 12])
+        frame = array.to_pandas()
+        assert frame["hypotenuse"].tolist() == [5.0, 13.0]
+        restored = RightTrianglePairArray.from_pandas(frame)
+        assert np.shares_memory(restored.second, array.second)
+
+
+class TestTriangleIndex:
+    @staticmethod
+    def make_index():
+        triangles = [RightTrianglePair(a, b) for a, b in [(5, 12), (3, 4), (8, 15)]]
+        return TriangleIndex(triangles), triangles
+
+    def test_sorted_iteration(self):
+        index, triangles = self.make_index()
+        assert [t.hypotenuse for t in index] == [5.0, 13.0, 17.0]
+        assert len(index) == 3
+
+    def test_range_and_rank(self):
+        index, _ = self.make_index()
+        assert index.range(5, 13) == [RightTrianglePair(3, 4), RightTrianglePair(5, 12)]
+        assert index.rank(13) == 1
+        assert index.kth(2) == RightTrianglePair(8, 15)
+        with pytest.raises(IndexError, match="Индекс вне диапазона"):
+            index.kth(3)
+
+    def test_nearest(self):
+        index, _ = self.make_index()
+        assert index.nearest(10) == RightTrianglePair(5, 12)
+        assert index.nearest(100) == RightTrianglePair(8, 15)
+
+    def test_remove(self):
+        index, triangles = self.make_index()
+        index.remove(triangles[0])
+        assert triangles[0] not in index
+        assert [t.hypotenuse for t in index] == [5.0, 17.0]
+        with pytest.raises(ValueError, match="Треугольник не найден в индексе"):
+            index.remove(triangles[0])
+
+    def test_setter_updates_index(self):
+        index, triangles = self.make_index()
+        triangles[1].first = 30
+        triangles[0] *= 10
+        assert [t.hypotenuse for t in index] == [17.0, 30.265491900843113, 130.0]
+        assert index.range(100, 200) == [RightTrianglePair(50, 120)]
+
+    def test_dropped_index_detaches(self):
+        index, triangles = self.make_index()
+        for _ in range(50):
+            TriangleIndex(triangles)
+        assert len(triangles[0]._RightTrianglePair__observers) == 1
+        del index
+        assert triangles[0]._RightTrianglePair__observers is None
+        triangles[0].first = 1
+
+
+class TestTriangleLoader:
+    LEGS = [(3.0, 4.0), (5.0, 12.0), (8.0, 15.0), (7.0, 24.0), (1.5, 2.0)]
+
+    def table(self):
+        first, second = zip(*self.LEGS)
+        return pa.table({"first": list(first), "second": list(second)})
+
+    def test_csv_chunks(self, tmp_path):
+        path = tmp_path / "legs.csv"
+        path.write_text(
+            "first,second,label\n" + "".join(f"{a},{b},x\n" for a, b in self.LEGS)
+        )
+        batches = list(iter_triangle_batches(path, chunk_size=2))
+        assert all(len(batch) <= 2 for batch in batches)
+        assert sum(len(batch) for batch in batches) == len(self.LEGS)
+        assert list(iter_triangles(path)) == [RightTrianglePair(*p) for p in self.LEGS]
+
+    def test_parquet_and_arrow(self, tmp_path):
+        parquet_path = tmp_path / "legs.parquet"
+        arrow_path = tmp_path / "legs.arrow"
+        pq.write_table(self.table(), parquet_path)
+        with pa.OSFile(str(arrow_path), "wb") as sink:
+            with pa.ipc.new_file(sink, self.table().schema) as writer:
+                writer.write_table(self.table())
+        expected = [RightTrianglePair(*p) for p in self.LEGS]
+        assert list(iter_triangles(parquet_path, chunk_size=3)) == expected
+        assert list(iter_triangles(arrow_path, chunk_size=3)) == expected
+
+    def test_invalid_chunk(self, tmp_path):
+        path = tmp_path / "legs.csv"
+        path.write_text("first,second\n3,4\n-1,2\n")
+        with pytest.raises(
+            ValueError, match="Катеты должны быть положительными числами"
+        ):
+            list(iter_triangles(path))
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError, match="Неизвестный формат файла"):
+            list(iter_triangles(tmp_path / "legs.txt"))
+
+    def test_missing_column(self, tmp_path):
+        path = tmp_path / "legs.arrow"
+        table = pa.table({"a": [3.0], "b": [4.0]})
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        with pytest.raises(ValueError, match="Столбец не найден: first"):
+            list(iter_triangles(path))
+        assert list(iter_triangles(path, first_column="a", second_column="b")) == [
+            RightTrianglePair(3.0, 4.0)
+        ]
+
+
+class TestTriangleDedup:
+    LEGS = [(3, 4), (5, 12), (3, 4), (3.05, 4), (5, 12.02), (8, 15)]
+
+    def triangles(self):
+        return [RightTrianglePair(a, b) for a, b in self.LEGS]
+
+    def test_exact_deduplicate(self):
+        result = list(deduplicate(iter(self.triangles())))
+        assert result == [
+            RightTrianglePair(3, 4),
+            RightTrianglePair(5, 12),
+            RightTrianglePair(3.05, 4),
+            RightTrianglePair(5, 12.02),
+            RightTrianglePair(8, 15),
+        ]
+
+    def test_tolerance_deduplicate(self):
+        result = list(deduplicate(self.triangles(), tolerance=0.1))
+        assert result == [
+            RightTrianglePair(3, 4),
+            RightTrianglePair(5, 12),
+            RightTrianglePair(8, 15),
+        ]
+
+    def test_group_by(self):
+        groups = group_by(self.triangles(), tolerance=0.1)
+        assert len(groups[RightTrianglePair(3, 4)]) == 3
+        assert len(group_by(self.triangles())[RightTrianglePair(3, 4)]) == 2
+
+    def test_columnar(self):
+        array = RightTrianglePairArray.from_pairs(self.triangles())
+        assert group_labels(array).tolist() == [0, 1, 0, 2, 3, 4]
+        assert group_labels(array, tolerance=0.1).tolist() == [0, 1, 0, 0, 1, 2]
+        assert deduplicate_array(array).to_pairs() == list(
+            deduplicate(self.triangles())
+        )
+        assert deduplicate_array(array, 0.1).to_pairs() == list(
+            deduplicate(self.triangles(), 0.1)
+        )
+
+
+class TestTriangleParallel:
+    @staticmethod
+    def triangles():
+        return [RightTrianglePair(i % 7 + 1, i % 5 + 2) for i in range(50)]
+
+    def test_sum_matches_serial(self):
+        triangles = self.triangles()
+        expected = reduce(operator.add, triangles)
+        assert parallel_sum(triangles, chunk_size=8, max_workers=2) == expected
+        array = RightTrianglePairArray.from_pairs(triangles)
+        assert parallel_sum(array, chunk_size=8, max_workers=2) == expected
+
+    def test_sum_is_bit_identical(self):
+        rng = random.Random(1)
+        triangles = [
+            RightTrianglePair(rng.uniform(1, 100), rng.uniform(1, 100))
+            for _ in range(1000)
+        ]
+        expected = reduce(operator.add, triangles)
+        assert parallel_sum(triangles, max_workers=1) == expected
+        assert parallel_sum(triangles, chunk_size=100, max_workers=2) == expected
+        array = RightTrianglePairArray.from_pairs(triangles)
+        assert parallel_sum(array, chunk_size=100) == expected
+
+    def test_scale_matches_serial(self):
+        triangles = self.triangles()
+        result = parallel_scale(triangles, 1.5, chunk_size=8, max_workers=2)
+        assert result == [t * 1.5 for t in triangles]
+        with pytest.raises(
+            ValueError, match="Катеты должны быть положительными числами"
+        ):
+            parallel_scale(triangles, -1, chunk_size=8, max_workers=1)
+
+    def test_min_max_return_first_extreme(self):
+        triangles = self.triangles()
+        smallest = parallel_min(triangles, chunk_size=8, max_workers=2)
+        largest = parallel_max(triangles, chunk_size=8, max_workers=2)
+        assert smallest is min(triangles)
+        assert largest is max(triangles)
+
+    def test_hypotenuse_stats(self):
+        triangles = self.triangles()
+        stats = parallel_hypotenuse_stats(triangles, chunk_size=8, max_workers=1)
+        assert stats.count == 50
+        assert stats.minimum == min(t.hypotenuse for t in triangles)
+        assert stats.maximum == max(t.hypotenuse for t in triangles)
+        assert stats.mean == pytest.approx(sum(t.hypotenuse for t in triangles) / 50)
+
+    def test_empty_collection(self):
+        with pytest.raises(ValueError, match="Коллекция треугольников пуста"):
+            parallel_sum([])
+
+
+class TestIntegerRightTrianglePair:
+    def test_integer_legs(self):
+        triangle = IntegerRightTrianglePair(3.0, "4")
+        assert type(triangle.first) is int and type(triangle.second) is int
+        assert triangle.exact_hypotenuse == 5
+        assert triangle.is_pythagorean
+        assert not IntegerRightTrianglePair(1, 1).is_pythagorean
+        assert str(triangle) == "IntegerRightTrianglePair(3, 4)"
+
+    def test_non_integer_leg(self):
+        with pytest.raises(ValueError, match="Катеты должны быть целыми числами"):
+            IntegerRightTrianglePair(3.5, 4)
+        with pytest.raises(
+            ValueError, match="Катеты должны быть положительными числами"
+        ):
+            IntegerRightTrianglePair(0, 4)
+
+    def test_exact_ordering(self):
+        big = 10**17
+        t1 = IntegerRightTrianglePair(big, 1)
+        t2 = IntegerRightTrianglePair(big, 2)
+        assert t1.hypotenuse == t2.hypotenuse
+        assert t1 < t2 and t2 > t1 and t1 != t2
+
+    def test_integer_arithmetic(self):
+        result = IntegerRightTrianglePair(3, 4) * 2 + IntegerRightTrianglePair(1, 1)
+        assert isinstance(result, IntegerRightTrianglePair)
+        assert result == RightTrianglePair(7, 9)
+
+    def test_pythagorean_triples(self):
+        triples = set(pythagorean_triples(30))
+        brute = {
+            (a, b, c)
+            for c in range(1, 31)
+            for a in range(1, c)
+            for b in range(a + 1, c)
+            if a * a + b * b == c * c
+        }
+        assert triples == brute
+        assert set(pythagorean_triples(30, primitive_only=True)) == {
+            (3, 4, 5),
+            (5, 12, 13),
+            (8, 15, 17),
+            (7, 24, 25),
+            (20, 21, 29),
+        }
+        table = pythagorean_table(13)
+        assert [t.exact_hypotenuse for t in table] == [5, 10, 13]
+
+
+class TestTriangleInternCache:
+    def test_frozen_triangle(self):
+        triangle = FrozenRightTrianglePair(3, 4)
+        with pytest.raises(AttributeError, match="Треугольник неизменяем"):
+            triangle.first = 5
+        result = triangle
+        result += RightTrianglePair(1, 1)
+        assert result == RightTrianglePair(4, 5)
+        assert triangle == RightTrianglePair(3, 4)
+
+    def test_shared_instances_and_stats(self):
+        cache = TriangleInternCache(maxsize=2)
+        t1 = cache.get(3, 4)
+        assert cache.get(3.0, 4.0) is t1
+        cache.get(5, 12)
+        cache.get(3, 4)
+        cache.get(8, 15)
+        assert cache.info() == (2, 3, 1, 2, 2)
+        assert cache.get(3, 4) is t1
+        assert cache.get(5, 12) is not None
+        assert cache.info().evictions == 2
+
+    def test_invalid_legs_not_cached(self):
+        cache = TriangleInternCache()
+        with pytest.raises(
+            ValueError, match="Катеты должны быть положительными числами"
+        ):
+            cache.get(-1, 4)
+        assert len(cache) == 0
+
+    def test_module_factory(self):
+        triangle = make_interned_right_triangle_pair(6, 8)
+        assert make_interned_right_triangle_pair(6, 8) is triangle
+        assert interned_cache_info().hits >= 1
+
+
+class TestTriangleGrid:
+    @staticmethod
+    def triangles():
+        return [RightTrianglePair(a, b) for a in range(1, 11) for b in range(1, 11)]
+
+    def test_nearest(self):
+        grid = TriangleGrid.from_triangles(self.triangles())
+        assert grid.nearest(3.1, 4.2) == [RightTrianglePair(3, 4)]
+        result = grid.nearest(5, 5, k=5)
+        assert result[0] == RightTrianglePair(5, 5)
+        assert set(result[1:]) == {
+            RightTrianglePair(4, 5),
+            RightTrianglePair(6, 5),
+            RightTrianglePair(5, 4),
+            RightTrianglePair(5, 6),
+        }
+        assert len(grid.nearest(50, 50, k=200)) == 100
+
+    def test_within(self):
+        grid = TriangleGrid.from_triangles(
+            RightTrianglePairArray.from_pairs(self.triangles()), cell_size=2
+        )
+        assert set(grid.within(1, 1, 1)) == {
+            RightTrianglePair(1, 1),
+            RightTrianglePair(1, 2),
+            RightTrianglePair(2, 1),
+        }
+        assert grid.within(100, 100, 5) == []
+
+    def test_nearest_far_from_data(self):
+        rng = random.Random(4)
+        triangles = [
+            RightTrianglePair(rng.gauss(1000, 0.1), rng.gauss(1000, 0.1))
+            for _ in range(5_000)
+        ]
+        grid = TriangleGrid.from_triangles(triangles)
+        assert grid.cell_size < 0.1
+        for query in ((1, 1), (1000, 1), (5000, 5000)):
+            expected = sorted(
+                triangles,
+                key=lambda t: hypot(t.first - query[0], t.second - query[1]),
+            )[:3]
+            assert grid.nearest(*query, k=3) == expected
+
+    def test_points_without_spread(self):
+        triangles = [RightTrianglePair(1e7, 1e7) for _ in range(1000)]
+        grid = TriangleGrid.from_triangles(triangles)
+        assert grid.cell_size == 1.0
+        assert len(grid.within(1e7, 1e7, 1.0)) == 1000
+        # Крошечная ячейка не переполняет номера и совпадает с insert().
+        tiny = TriangleGrid.from_triangles(triangles[:2], cell_size=1e-14)
+        tiny.insert(RightTrianglePair(1e7, 1e7))
+        assert len(tiny._cells) == 1
+        assert len(tiny.within(1e7, 1e7, 1.0)) == 3
+
+    def test_dropped_grid_detaches(self):
+        triangles = self.triangles()
+        for _ in range(50):
+            TriangleGrid.from_triangles(triangles)
+        assert triangles[0]._RightTrianglePair__observers is None
+        grid = TriangleGrid.from_triangles(triangles)
+        triangles[0].first = 20
+        assert grid.nearest(20, 1) == [triangles[0]]
+
+    def test_incremental_insert_and_update(self):
+        grid = TriangleGrid(cell_size=1)
+        triangle = RightTrianglePair(3, 4)
+        grid.insert(triangle)
+        grid.insert(RightTrianglePair(10, 10))
+        assert grid.nearest(9, 9) == [RightTrianglePair(10, 10)]
+        triangle.first = 9
+        assert grid.nearest(9, 4) == [triangle]
+        grid.remove(triangle)
+        assert triangle not in grid and len(grid) == 1
+
+
+class TestDueDateIndex:
+    @staticmethod
+    def make_subscribers():
+        sub1 = Subscriber("Иванов", "LIB001", 10)
+        sub2 = Subscriber("Петров", "LIB002", 10)
+        book1 = Book("Автор1", "Книга1", 2024, "Издательство", 100.0)
+        book2 = Book("Автор2", "Книга2", 2024, "Издательство", 200.0)
+        book3 = Book("Автор3", "Книга3", 2024, "Издательство", 300.0)
+        sub1.add_book(book1, "2024-01-01")
+        sub1.add_book(book2, "2024-03-01")
+        sub2.add_book(book3, "2024-01-15")
+        return sub1, sub2, (book1, book2, book3)
+
+    def test_overdue_as_of_date(self):
+        sub1, sub2, books = self.make_subscribers()
+        index = DueDateIndex()
+        index.track(sub1)
+        index.track(sub2)
+
+        assert index.overdue("2024-01-31") == []
+        overdue = index.overdue("2024-02-20")
+        assert [(s.library_id, b.book) for s, b in overdue] == [
+            ("LIB001", books[0]),
+            ("LIB002", books[2]),
+        ]
+        assert len(index.overdue(date(2024, 12, 31))) == 3
+        # Дата без ведущих нулей разбирается, а не сравнивается как строка.
+        assert index.overdue("2024-1-5") == []
+        assert len(index.overdue("2024-2-1")) == 1
+
+    def test_returned_and_removed_loans_are_dropped(self):
+        sub1, sub2, books = self.make_subscribers()
+        index = DueDateIndex()
+        index.track(sub1)
+        index.track(sub2)
+
+        sub1[0].mark_returned()
+        sub2.remove_book(books[2])
+        assert [b.book for _, b in index.overdue("2024-12-31")] == [books[1]]
+
+        sub2.add_book(books[2], "2024-02-01")
+        assert len(index.overdue("2024-12-31")) == 2
+        assert len(index) == 2
+
+    def test_untrack(self):
+        sub1, sub2, _ = self.make_subscribers()
+        index = DueDateIndex()
+        index.track(sub1)
+        index.untrack(sub1)
+        sub1[0].mark_returned()
+        assert index.overdue("2024-12-31") == []
+
+    def test_assigning_returned_goes_through_mark_returned(self):
+        sub1, _, books = self.make_subscribers()
+        index = DueDateIndex()
+        index.track(sub1)
+        assert sub1.calculate_debt_cost() == 300.0
+
+        sub1[0].returned = True
+        assert sub1[0]._returned_day == date.today().toordinal()
+        assert [b.book for b in sub1.find_overdue_books()] == [books[1]]
+        assert sub1.calculate_debt_cost() == 200.0
+        assert sub1.generate_debt().overdue_count == 1
+        assert [b.book for _, b in index.overdue("2024-12-31")] == [books[1]]
+        with pytest.raises(ValueError, match="нельзя отменить"):
+            sub1[0].returned = False
+        sub1[1].returned = False
+        assert not sub1[1].returned
+
+    def test_same_loan_twice_on_one_card(self):
+        sub1, _, books = self.make_subscribers()
+        index = DueDateIndex()
+        index.track(sub1)
+
+        sub1[1] = sub1[0]
+        assert len(index) == 2
+        assert [b.book for _, b in index.overdue("2024-12-31")] == [books[0]] * 2
+        sub1.remove_book(books[0])
+        assert len(index) == 1
+        sub1.remove_book(books[0])
+        assert len(index) == 0
+
+
+class TestLibraryRegistry:
+    @staticmethod
+    def make_library():
+        library = Library(shard_count=4)
+        for number in range(10):
+            library.register(Subscriber(f"Абонент{number}", f"LIB{number:03}", 10))
+        return library
+
+    def test_register_and_lookup(self):
+        library = self.make_library()
+        assert len(library) == 10
+        assert "LIB003" in library
+        assert library["LIB003"].name == "Абонент3"
+        assert sum(len(library.shard(i)) for i in range(4)) == 10
+        assert library.shard_of("LIB003") == library.shard_of("LIB003")
+        with pytest.raises(ValueError, match="уже зарегистрирован"):
+            library.register(Subscriber("Дубль", "LIB003"))
+        with pytest.raises(KeyError):
+            library["LIB999"]
+
+    def test_same_loan_twice_on_one_card(self):
+        library = self.make_library()
+        book = Book("Автор", "Книга", 2024, "Издательство", 100.0)
+        other = Book("Автор", "Другая", 2024, "Издательство", 50.0)
+        card = library["LIB001"]
+        card.add_books([(book, "2024-01-01"), (other, "2024-01-01")])
+
+        card[1] = card[0]
+        assert len(library.due_dates) == 2
+        assert library.holders_of(other) == []
+        card.remove_book(book)
+        card.remove_book(book)
+        assert len(library.due_dates) == 0
+        assert library.holders_of(book) == []
+
+    def test_holders_reverse_index(self):
+        library = self.make_library()
+        book = Book("Автор", "Книга", 2024, "Издательство", 100.0)
+        library.issue_many([("LIB001", book, ""), ("LIB005", book, "")])
+        library["LIB005"].add_book(book)
+        assert [s.library_id for s in library.holders_of(book)] == [
+            "LIB001",
+            "LIB005",
+        ]
+
+        library.return_many([("LIB005", book), ("LIB001", book)])
+        assert [s.library_id for s in library.holders_of(book)] == ["LIB005"]
+        library.unregister("LIB005")
+        assert library.holders_of(book) == []
+
+    def test_generate_debts(self):
+        library = self.make_library()
+        old_date = (datetime.now() - timedelta(days=40)).strftime("%Y-%m-%d")
+        book1 = Book("Автор1", "Книга1", 2024, "Издательство", 100.0)
+        book2 = Book("Автор2", "Книга2", 2024, "Издательство", 200.0)
+        library.issue("LIB002", book1, old_date)
+        library.issue("LIB002", book2, old_date)
+        library.issue("LIB007", book2)
+
+        debts = library.generate_debts()
+        assert [(debt.library_id, debt.total_cost) for debt in debts] == [
+            ("LIB002", 300.0)
+        ]
+
+
+class TestSQLiteLibraryStore:
+    @staticmethod
+    def make_subscribers():
+        book1 = Book("Толстой", "Война и мир", 1869, "Эксмо", 1500.0)
+        book2 = Book("Пушкин", "Евгений Онегин", 1833, "Дрофа", 600.0)
+        sub1 = Subscriber("Иванов", "LIB001", 5)
+        sub2 = Subscriber("Петров", "LIB002", 5)
+        sub1.add_book(book1, "2024-01-01")
+        sub1.add_book(book2, "2024-03-01")
+        sub2.add_book(book1, "2024-02-01")
+        sub2[0].mark_returned()
+        return sub1, sub2
+
+    def test_round_trip_is_lazy(self, tmp_path):
+        path = tmp_path / "library.db"
+        sub1, sub2 = self.make_subscribers()
+        with SQLiteLibraryStore(path) as store:
+            store.save_many([sub1, sub2])
+
+        with SQLiteLibraryStore(path) as store:
+            assert len(store) == 2 and "LIB002" in store
+            assert store._loaded == {}
+            loaded = store["LIB001"]
+            assert list(store._loaded) == ["LIB001"]
+            assert str(loaded) == str(sub1)
+            assert store["LIB001"] is loaded
+            assert store["LIB002"][0].returned
+            with pytest.raises(KeyError):
+                store["LIB999"]
+
+    def test_pushed_down_queries(self):
+        sub1, sub2 = self.make_subscribers()
+        with SQLiteLibraryStore() as store:
+            store.save_many([sub1, sub2])
+            by_author = store.find_by_author("толстой")
+            assert [(lid, b.issue_date) for lid, b in by_author] == [
+                ("LIB001", "2024-01-01"),
+                ("LIB002", "2024-02-01"),
+            ]
+            assert [lid for lid, _ in store.find_by_year(1833)] == ["LIB001"]
+            assert len(store.find_by_publisher("ЭКСМО")) == 2
+            overdue = store.find_overdue(date(2024, 3, 1))
+            assert [(lid, b.book.title) for lid, b in overdue] == [
+                ("LIB001", "Война и мир")
+            ]
+            # Выдача LIB002 со сроком 2024-03-02 возвращена сегодня.
+            overdue = store.find_overdue(date(2024, 3, 5))
+            assert [lid for lid, _ in overdue] == ["LIB001", "LIB002"]
+            assert overdue[1][1]._returned_day == date.today().toordinal()
+            assert [lid for lid, _ in store.find_overdue()] == ["LIB001", "LIB001"]
+
+    def test_save_replaces_loans(self):
+        sub1, _ = self.make_subscribers()
+        with SQLiteLibraryStore() as store:
+            store.save(sub1)
+            sub1.remove_book(sub1[0].book)
+            store.save(sub1)
+            store.evict("LIB001")
+            assert len(store["LIB001"]) == 1
+            assert store.find_by_author("Толстой") == []
+
+    def test_failed_batch_leaves_no_stale_book_ids(self):
+        sub1, sub2 = self.make_subscribers()
+        with SQLiteLibraryStore() as store:
+            with pytest.raises(ValueError, match="повторяется в пакете: LIB001"):
+                store.save_many([sub1, Subscriber("Другой", "LIB001", 5)])
+            # Выдача без даты нарушает NOT NULL уже после записи книг.
+            sub2[0]._issue_day = None
+            with pytest.raises(sqlite3.IntegrityError):
+                store.save_many([sub1, sub2])
+            assert store._book_ids == {}
+            store.save(sub1)
+            store.evict("LIB001")
+            assert len(store["LIB001"]) == 2
+
+
+class TestLibraryLedger:
+    make_subscribers = staticmethod(TestSQLiteLibraryStore.make_subscribers)
+
+    def test_table_columns(self):
+        sub1, sub2 = self.make_subscribers()
+        table = ledger_table([sub1, sub2])
+        assert table.num_rows == 3
+        assert table.column("library_id").to_pylist() == ["LIB001"] * 2 + ["LIB002"]
+        assert table.column("issue_date").to_pylist()[0] == date(2024, 1, 1)
+        assert table.column("return_date").to_pylist()[0] == date(2024, 1, 31)
+        assert table.column("returned").to_pylist() == [False, False, True]
+        assert table.column("price").to_pylist() == [1500.0, 600.0, 1500.0]
+
+    def test_batches(self):
+        sub1, sub2 = self.make_subscribers()
+        batches = list(iter_ledger_batches([sub1, sub2], batch_size=2))
+        assert [batch.num_rows for batch in batches] == [2, 1]
+        with pytest.raises(ValueError):
+            list(iter_ledger_batches([sub1], batch_size=0))
+
+    def test_frame_analytics(self):
+        frame = ledger_frame(self.make_subscribers())
+        assert frame.groupby("publisher")["price"].sum().to_dict() == {
+            "Дрофа": 600.0,
+            "Эксмо": 3000.0,
+        }
+        assert str(frame["issue_date"].dtype).startswith("datetime64")
+
+    def test_round_trip_from_table(self):
+        sub1, sub2 = self.make_subscribers()
+        restored = subscribers_from_ledger(ledger_table([sub1, sub2]), size=5)
+        assert [str(sub) for sub in restored] == [str(sub1), str(sub2)]
+        assert restored[1][0].returned
+        assert restored[0][0].book is restored[1][0].book
+
+    def test_round_trip_from_frame(self):
+        sub1, sub2 = self.make_subscribers()
+        restored = subscribers_from_ledger(ledger_frame([sub1, sub2]))
+        assert [sub.library_id for sub in restored] == ["LIB001", "LIB002"]
+        assert [b.return_date for b in restored[0]] == ["2024-01-31", "2024-03-31"]
+
+
+class TestLibraryService:
+    BOOK = {
+        "author": "Толстой",
+        "title": "Война и мир",
+        "year": 1869,
+        "publisher": "Эксмо",
+        "price": 1500.0,
+    }
+
+    def test_operations(self):
+        async def scenario():
+            service = LibraryService()
+            await service.handle({"op": "register", "library_id": "LIB001"})
+            issued = await service.handle(
+                {
+                    "op": "issue",
+                    "library_id": "LIB001",
+                    "book": self.BOOK,
+                    "issue_date": "2024-01-01",
+                }
+            )
+            found = await service.handle(
+                {
+                    "op": "find",
+                    "library_id": "LIB001",
+                    "by": "author",
+                    "value": "толстой",
+                }
+            )
+            debt = await service.handle({"op": "debt", "library_id": "LIB001"})
+            returned = await service.handle(
+                {"op": "return", "library_id": "LIB001", "book": self.BOOK}
+            )
+            return service, issued, found, debt, returned
+
+        service, issued, found, debt, returned = asyncio.run(scenario())
+        assert issued["ok"] and issued["result"]["return_date"] == "2024-01-31"
+        assert [loan["title"] for loan in found["result"]] == ["Война и мир"]
+        assert debt["result"]["total_cost"] == 1500.0
+        assert returned == {"ok": True, "result": None}
+        assert len(service.library["LIB001"]) == 0
+
+    def test_errors_are_responses(self):
+        async def scenario():
+            service = LibraryService()
+            return [
+                await service.handle_line("не json"),
+                await service.handle_line('{"op": "debt", "library_id": "X", "id": 7}'),
+                await service.handle_line('{"op": "steal", "library_id": "X"}'),
+            ]
+
+        bad, missing, unknown = [json.loads(line) for line in asyncio.run(scenario())]
+        assert bad == {"ok": False, "error": "Некорректный запрос"}
+        assert missing == {"id": 7, "ok": False, "error": "Абонент не найден: X"}
+        assert not unknown["ok"] and "steal" in unknown["error"]
+
+    def test_wrong_field_types_are_responses(self):
+        async def scenario():
+            service = LibraryService()
+            await service.handle({"op": "register", "library_id": "LIB001"})
+            return [
+                await service.handle(
+                    {"op": "find", "library_id": "LIB001", "by": "author", "value": 5}
+                ),
+                await service.handle(
+                    {"op": "debt", "library_id": "LIB001", "as_of": 5, "id": 2}
+                ),
+            ]
+
+        find, debt = asyncio.run(scenario())
+        assert find["ok"] is False and "error" in find
+        assert debt["ok"] is False and debt["id"] == 2
+
+    def test_locks_are_per_subscriber(self):
+        service = LibraryService()
+        assert service.lock_for("LIB001") is service.lock_for("LIB001")
+        assert service.lock_for("LIB001") is not service.lock_for("LIB002")
+
+    def test_tcp_pipelined_requests(self):
+        async def scenario():
+            service = LibraryService()
+            server = await service.serve_tcp()
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            requests = [{"op": "register", "library_id": "LIB001", "id": 0}] + [
+                {
+                    "op": "issue",
+                    "library_id": "LIB001",
+                    "book": {**self.BOOK, "title": f"Том {i}"},
+                    "id": i,
+                }
+                for i in range(1, 6)
+            ]
+            for request in requests:
+                writer.write((json.dumps(request) + "\n").encode())
+            writer.write_eof()
+            responses = [json.loads(line) async for line in reader]
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return service, responses
+
+        service, responses = asyncio.run(scenario())
+        assert sorted(r["id"] for r in responses if r["ok"]) == list(range(6))
+        titles = [loan.book.title for loan in service.library["LIB001"]]
+        assert titles == [f"Том {i}" for i in range(1, 6)]
+
+    def test_persists_to_store(self, tmp_path):
+        path = tmp_path / "library.db"
+
+        async def scenario(requests):
+            service = LibraryService(store_path=path)
+            await service.open()
+            for request in requests:
+                await service.handle(request)
+            await service.close()
+            return service
+
+        asyncio.run(
+            scenario(
+                [
+                    {"op": "register", "library_id": "LIB001", "name": "Иванов"},
+                    {"op": "issue", "library_id": "LIB001", "book": self.BOOK},
+                    {"op": "register", "library_id": "LIB002", "name": "Петров"},
+                ]
+            )
+        )
+        service = asyncio.run(scenario([]))
+        assert len(service.library) == 0
+        # Карточка читается из хранилища при первом запросе к ней.
+        service = asyncio.run(scenario([{"op": "debt", "library_id": "LIB001"}]))
+        assert [s.library_id for s in service.library] == ["LIB001"]
+        assert service.library["LIB001"].name == "Иванов"
+        assert service.library["LIB001"][0].book.title == "Война и мир"
+        service = asyncio.run(
+            scenario([{"op": "register", "library_id": "LIB002", "id": 1}])
+        )
+        assert service.library["LIB002"].name == "Петров"
+
+
+class TestConcurrentSubscriber:
+    BOOKS = [
+        Book(f"Автор{i % 3}", f"Книга{i}", 2000 + i % 4, "Эксмо", i) for i in range(40)
+    ]
+
+    @staticmethod
+    def run_threads(target, count=16):
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_limit_holds_under_threads(self):
+        card = ConcurrentSubscriber("Иванов", "LIB001", 50)
+        rejected = []
+
+        def add(i):
+            for book in self.BOOKS[:10]:
+                try:
+                    card.add_book(book, "2024-01-01")
+                except ValueError:
+                    rejected.append(i)
+
+        self.run_threads(add)
+        assert card.count == len(card) == 50
+        assert len(rejected) == 16 * 10 - 50
+        assert sum(len(b) for b in card._by_author.values()) == 50
+
+    def test_reads_see_published_snapshots(self):
+        card = ConcurrentSubscriber("Иванов", "LIB001", 1000)
+        snapshot = card._books
+        bucket = card._by_author.get("автор0", {})
+        card.add_books((book, "2024-01-01") for book in self.BOOKS)
+        assert snapshot == [] and bucket == {}
+        books = card._books
+        card.remove_book(self.BOOKS[0])
+        assert len(books) == 40 and len(card) == 39
+        assert [b.book.title for b in card.find_by_author("Автор0")][:2] == [
+            "Книга3",
+            "Книга6",
+        ]
+
+    def test_transfer_is_atomic(self):
+        stripes = LockStripes(4)
+        cards = [ConcurrentSubscriber("", f"LIB{i}", 100, stripes) for i in range(4)]
+        cards[0].add_books((book, "2024-01-01") for book in self.BOOKS)
+
+        def move(i):
+            for book in self.BOOKS[i::16]:
+                transfer_book(cards[0], cards[1 + i % 3], book)
+
+        self.run_threads(move)
+        assert len(cards[0]) == 0
+        assert sum(len(card) for card in cards) == 40
+        with pytest.raises(ValueError):
+            transfer_book(cards[1], cards[0], Book("Нет", "Нет", 2000, "Нет", 1))
+
+    def test_stripes(self):
+        stripes = LockStripes(8)
+        assert stripes.stripe_of("LIB001") == stripes.stripe_of("LIB001")
+        with stripes.holding([3, 1, 3]):
+            with stripes.holding([1]):
+                pass
+        with pytest.raises(ValueError):
+            LockStripes(0)
+
+
+class TestOverdueTotals:
+    BOOKS = [
+        Book("Автор", f"Книга{i}", 2000, "Эксмо", 100.0 * (i + 1)) for i in range(6)
+    ]
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        class Clock(date):
+            current = date(2024, 1, 10)
+
+            @classmethod
+            def today(cls):
+                return cls.current
+
+        monkeypatch.setattr(library_model, "date", Clock)
+        return Clock
+
+    @staticmethod
+    def rescan(subscriber):
+        overdue = [b for b in subscriber._books if b.is_overdue()]
+        return overdue, sum(b.book.price for b in overdue)
+
+    def test_rollover_return_and_removal(self, clock):
+        subscriber = Subscriber("Иванов", "LIB001", 10)
+        subscriber.add_book(self.BOOKS[0], "2024-01-01")
+        subscriber.add_book(self.BOOKS[1], "2024-01-05")
+        assert subscriber.calculate_debt_cost() == 0
+        clock.current = date(2024, 2, 1)
+        assert subscriber.calculate_debt_cost() == 100.0
+        clock.current = date(2024, 2, 5)
+        assert subscriber.find_overdue_books() == subscriber._books
+        assert subscriber.calculate_debt_cost() == 300.0
+        subscriber[0].mark_returned()
+        assert subscriber.calculate_debt_cost() == 200.0
+        subscriber.remove_book(self.BOOKS[1])
+        assert subscriber.generate_debt().overdue_count == 0
+
+    def test_due_date_change(self, clock):
+        subscriber = Subscriber("Иванов", "LIB001", 10)
+        index = DueDateIndex()
+        index.track(subscriber)
+        subscriber.add_book(self.BOOKS[0], "2024-01-05")
+        subscriber[0].return_date = "2024-01-08"
+        assert subscriber.calculate_debt_cost() == 100.0
+        assert len(index.overdue("2024-01-10")) == 1
+        subscriber[0].return_date = "2024-03-01"
+        assert subscriber.calculate_debt_cost() == 0
+        assert index.overdue("2024-01-10") == []
+
+    def test_debt_books_are_lazy(self, clock):
+        subscriber = Subscriber("Иванов", "LIB001", 10)
+        subscriber.add_book(self.BOOKS[0], "2023-12-01")
+        subscriber.add_book(self.BOOKS[1], "2024-01-09")
+        debt = subscriber.generate_debt()
+        assert debt._overdue_books is None
+        assert (debt.overdue_count, debt.total_cost) == (1, 100.0)
+        eager = Debt("Иванов", "LIB001", [subscriber[0]])
+        assert str(debt) == str(eager)
+        assert debt.overdue_books == [subscriber[0]]
+
+    def test_debt_is_a_consistent_snapshot(self, clock):
+        subscriber = Subscriber("Иванов", "LIB001", 10)
+        subscriber.add_book(self.BOOKS[0], "2023-12-01")
+        subscriber.add_book(self.BOOKS[1], "2023-12-02")
+        debt = subscriber.generate_debt()
+        subscriber[0].mark_returned()
+        subscriber.remove_book(self.BOOKS[1])
+        assert (debt.overdue_count, debt.total_cost) == (2, 300.0)
+        assert [b.book for b in debt.overdue_books] == self.BOOKS[:2]
+
+    def test_temporary_cards_do_not_stay_subscribed(self, clock):
+        card = Subscriber("Иванов", "LIB001", 10)
+        card.add_book(self.BOOKS[0], "2023-12-01")
+        other = Subscriber("Иванов", "LIB001", 10)
+        for _ in range(100):
+            card & card, card - other, card + card
+        assert len(card[0]._observers) == 1
+        kept = card + other
+        card[0].mark_returned()
+        assert card.calculate_debt_cost() == kept.calculate_debt_cost() == 0
+
+    def test_matches_rescan(self, clock):
+        rng = random.Random(7)
+        subscriber = Subscriber("Иванов", "LIB001", 50)
+        for step in range(400):
+            action = rng.random()
+            if action < 0.4 and subscriber.count < subscriber.size:
+                issued = date(2024, 1, 1) + timedelta(days=rng.randrange(60))
+                subscriber.add_book(rng.choice(self.BOOKS), issued.isoformat())
+            elif action < 0.6 and len(subscriber):
+                subscriber.remove_book(rng.choice(subscriber._books).book)
+            elif action < 0.7 and len(subscriber):
+                rng.choice(subscriber._books).mark_returned()
+            elif action < 0.8 and len(subscriber):
+                index = rng.randrange(len(subscriber))
+                subscriber[index] = BorrowedBook(rng.choice(self.BOOKS), "2024-01-20")
+            else:
+                clock.current += timedelta(days=rng.randrange(-2, 4))
+            overdue, cost = self.rescan(subscriber)
+            assert subscriber.find_overdue_books() == overdue
+            assert subscriber.calculate_debt_cost() == cost
+
+
+class TestReports:
+    @staticmethod
+    def make_subscriber():
+        subscriber = Subscriber("Иванов", "LIB001", 10)
+        for i in range(5):
+            book = Book("Толстой", f"Том {i}", 1869, "Эксмо", 100.0)
+            subscriber.add_book(book, "2024-01-01" if i % 2 else "2999-01-01")
+        subscriber[1].mark_returned()
+        return subscriber
+
+    def test_stream_is_byte_identical(self):
+        subscriber = self.make_subscriber()
+        debt = subscriber.generate_debt()
+        for report in (subscriber, debt, Debt("Пусто", "LIB000", [])):
+            stream = io.StringIO()
+            report.write_report(stream)
+            assert stream.getvalue() == str(report)
+            assert list(report.iter_report()) == str(report).split("\n")
+
+    def test_pagination_keeps_numbering(self):
+        subscriber = self.make_subscriber()
+        lines = list(subscriber.iter_report(offset=2, limit=2))
+        assert lines[:4] == str(subscriber).split("\n")[:4]
+        assert [line[:6] for line in lines[4:]] == ["  3. '", "  4. '"]
+        assert len(list(subscriber.iter_report(offset=10))) == 4
+        with pytest.raises(ValueError):
+            list(subscriber.iter_report(offset=-1))
+
+    def test_today_is_computed_once(self, monkeypatch):
+        calls = []
+
+        class Clock(date):
+            @classmethod
+            def today(cls):
+                calls.append(1)
+                return date(2024, 6, 1)
+
+        subscriber = self.make_subscriber()
+        monkeypatch.setattr(library_model, "date", Clock)
+        calls.clear()
+        report = list(subscriber.iter_report())
+        assert len(calls) == 1
+        assert sum("(просрочена)" in line for line in report) == 1
+
+
+class TestSubscriberLoanOrder:
+    BOOKS = [Book("Автор", f"Книга{i % 7}", 2000, "Эксмо", 10.0) for i in range(7)]
+
+    @pytest.mark.parametrize("card_type", [Subscriber, ConcurrentSubscriber])
+    def test_matches_list_model(self, card_type):
+        rng = random.Random(3)
+        subscriber = card_type("Иванов", "LIB001", 1000)
+        model: list[BorrowedBook] = []
+        for _ in range(600):
+            action = rng.random()
+            book = rng.choice(self.BOOKS)
+            if action < 0.45:
+                subscriber.add_book(book, "2024-01-01")
+                model.append(subscriber[len(subscriber) - 1])
+            elif action < 0.75:
+                expected = next((b for b in model if b.book == book), None)
+                if expected is None:
+                    with pytest.raises(ValueError):
+                        subscriber.remove_book(book)
+                else:
+                    subscriber.remove_book(book)
+                    model.remove(expected)
+            elif action < 0.9 and model:
+                index = rng.randrange(len(model))
+                model[index] = BorrowedBook(book, "2024-02-01")
+                subscriber[index] = model[index]
+            assert [subscriber[i] for i in range(len(subscriber))] == model
+            assert (book in subscriber) == any(b.book == book for b in model)
+        assert subscriber.count == len(subscriber) == len(model)
+
+    def test_removes_first_loan_in_card_order(self):
+        subscriber = Subscriber("Иванов", "LIB001", 10)
+        for title in ("А", "Б", "В"):
+            subscriber.add_book(Book("Автор", title, 2000, "Эксмо", 1.0))
+        # Замена в начале карточки: её выдача должна удаляться первой.
+        subscriber[0] = BorrowedBook(Book("Автор", "В", 2000, "Эксмо", 1.0))
+        first = subscriber[0]
+        subscriber.remove_book(Book("Автор", "В", 2000, "Эксмо", 1.0))
+        assert first not in subscriber._books
+        assert [b.book.title for b in subscriber._books] == ["Б", "В"]
+
+    def test_contains_ignores_other_types(self):
+        subscriber = Subscriber("Иванов", "LIB001", 10)
+        subscriber.add_book(self.BOOKS[0])
+        assert self.BOOKS[0] in subscriber
+        assert "Книга0" not in subscriber and [] not in subscriber
+        with pytest.raises(ValueError):
+            subscriber.remove_book("Книга0")
+
+
+class TestBookSearchIndex:
+    BOOKS = [
+        Book("Толстой Л.Н.", "Война и мир", 1869, "Эксмо", 1500.0),
+        Book("Толстой Л.Н.", "Анна Каренина", 1877, "АСТ", 900.0),
+        Book("Достоевский Ф.М.", "Преступление и наказание", 1866, "АСТ", 800.0),
+        Book("Толстой А.Н.", "Хождение по мукам", 1941, "Эксмо", 700.0),
+        Book("Ремарк Э.М.", "Время жить и время умирать", 1954, "АСТ", 650.0),
+    ]
+
+    def make_index(self):
+        index = BookSearchIndex()
+        for book in self.BOOKS:
+            index.add(book)
+        return index
+
+    def test_tokenize_casefolds(self):
+        assert tokenize("Война И МИР, т.1") == ["война", "и", "мир", "т", "1"]
+
+    def test_ranked_multi_term_search(self):
+        index = self.make_index()
+        hits = index.search("толстой")
+        assert [hit.book.title for hit in hits] == [
+            "Война и мир",
+            "Анна Каренина",
+            "Хождение по мукам",
+        ]
+        assert [hit.book.title for hit in index.search("толстой аст")] == [
+            "Анна Каренина"
+        ]
+        # Совпадение в названии весит больше, чем в издательстве.
+        assert index.search("время")[0].book.title.startswith("Время")
+        assert index.search("толстой ремарк") == []
+
+    def test_prefix_and_autocomplete(self):
+        index = self.make_index()
+        assert [hit.book.title for hit in index.search("прест")] == [
+            "Преступление и наказание"
+        ]
+        assert index.search("прест", prefix=False) == []
+        assert index.complete("Т") == ["толстой"]
+        # Чаще встречающиеся слова первыми, при равенстве — по алфавиту.
+        assert index.complete("а") == ["аст", "а", "анна"]
+        assert index.complete("в", limit=1) == ["война"]
+
+    def test_prefix_beyond_expansion_limit(self):
+        index = BookSearchIndex()
+        for i in range(100):
+            index.add(Book("Автор", f"ab{i:03}", 2000, "Издательство", 1.0))
+        index.add(Book("Автор", "abzzz special", 2000, "Издательство", 1.0))
+        # Префикс проверяется по всем своим токенам, а не по первым 64.
+        assert [hit.book.title for hit in index.search("special ab")] == [
+            "abzzz special"
+        ]
+        assert len(index.search("ab", limit=200)) == 64
+
+    def test_top_results_match_full_ranking(self):
+        rng = random.Random(5)
+        words = ["мир", "мирный", "мираж", "война", "вой", "дом"]
+        index = BookSearchIndex()
+        for i in range(300):
+            title = " ".join(rng.choices(words, k=rng.randint(1, 3)))
+            author = rng.choice(words) + " " + rng.choice(words)
+            index.add(Book(author, title, 2000, rng.choice(words), float(i)))
+        for query in ("мир", "ми", "вой", "в", "дом ми", "мир вой"):
+            full = index.search(query, limit=len(index))
+            assert index.search(query, limit=5) == full[:5]
+
+    def test_reference_counting(self):
+        index = self.make_index()
+        index.add(Book("Толстой Л.Н.", "Война и мир", 1869, "Эксмо", 1500.0))
+        index.discard(self.BOOKS[0])
+        assert self.BOOKS[0] in index
+        index.discard(self.BOOKS[0])
+        assert self.BOOKS[0] not in index and index.complete("вой") == []
+        with pytest.raises(ValueError):
+            index.discard(self.BOOKS[0])
+
+    def test_same_loan_twice_on_one_card(self):
+        index = BookSearchIndex()
+        subscriber = Subscriber("Иванов", "LIB001", 10)
+        subscriber.add_books([(self.BOOKS[0], ""), (self.BOOKS[1], "")])
+        index.track(subscriber)
+
+        subscriber[1] = subscriber[0]
+        assert self.BOOKS[1] not in index
+        subscriber.remove_book(self.BOOKS[0])
+        assert self.BOOKS[0] in index
+        subscriber.remove_book(self.BOOKS[0])
+        assert len(index) == 0
+
+    def test_library_catalog_follows_loans(self):
+        library = Library()
+        subscriber = Subscriber("Иванов", "LIB001", 10)
+        subscriber.add_book(self.BOOKS[0], "2024-01-01")
+        library.register(subscriber)
+        library.issue("LIB001", self.BOOKS[2], "2024-01-02")
+        assert len(library.catalog) == 2
+        assert library.catalog.search("наказ")[0].book == self.BOOKS[2]
+        library.return_book("LIB001", self.BOOKS[2])
+        assert library.catalog.search("наказ") == []
+        library.unregister("LIB001")
+        assert len(library.catalog) == 0
+
+
+class TestDebtAging:
+    BOOKS = [
+        Book("Автор", f"Книга{i}", 2000, "Эксмо", 100.0 * (i + 1)) for i in range(4)
+    ]
+
+    def make_subscribers(self):
+        first = Subscriber("Иванов", "LIB001", 10)
+        # Сроки возврата: 2024-01-31, 2024-03-01, 2024-04-30.
+        first.add_books(
+            [
+                (self.BOOKS[0], "2024-01-01"),
+                (self.BOOKS[1], "2024-01-31"),
+                (self.BOOKS[2], "2024-03-31"),
+            ]
+        )
+        second = Subscriber("Петров", "LIB002", 10)
+        second.add_books([(self.BOOKS[3], "2024-01-01"), (self.BOOKS[0], "2024-04-01")])
+        second[0].mark_returned()
+        second[0]._returned_day = date(2024, 2, 10).toordinal()
+        return [first, second, Subscriber("Сидоров", "LIB003", 10)]
+
+    def test_as_of_queries(self):
+        subscriber = self.make_subscribers()[0]
+        assert not subscriber[0].is_overdue("2024-01-31")
+        assert subscriber[0].is_overdue(date(2024, 2, 1))
+        books = subscriber.find_overdue_books("2024-03-02")
+        assert books == subscriber._books[:2]
+        assert subscriber.calculate_debt_cost("2024-03-02") == 300.0
+        assert subscriber.calculate_debt_cost(date(2024, 1, 1)) == 0
+        debt = subscriber.generate_debt("2024-03-02")
+        assert (debt.overdue_count, debt.total_cost) == (2, 300.0)
+        assert debt.overdue_books == books
+        # Просрочка в отчёте отмечается на дату долга, а не на сегодня.
+        future = subscriber.generate_debt(date.today() + timedelta(days=10_000))
+        assert str(future).count("(просрочена)") == 3
+
+    def test_returned_loans_are_overdue_until_returned(self):
+        returned = self.make_subscribers()[1][0]
+        assert returned.is_overdue("2024-02-09")
+        assert not returned.is_overdue("2024-02-10")
+        assert not returned.is_overdue()
+        loan = BorrowedBook(self.BOOKS[0], "2024-01-01")
+        loan.mark_returned()
+        assert loan._returned_day == date.today().toordinal()
+        assert loan.is_overdue("2024-02-01") and not loan.is_overdue()
+
+    def test_library_debts_as_of(self):
+        library = Library()
+        for subscriber in self.make_subscribers():
+            library.register(subscriber)
+        debts = library.generate_debts("2024-02-15")
+        assert [(d.library_id, d.total_cost) for d in debts] == [("LIB001", 100.0)]
+        # Возвращённая 2024-02-10 книга на 2024-02-05 ещё была просрочена.
+        debts = library.generate_debts("2024-02-05")
+        assert [(d.library_id, d.total_cost) for d in debts] == [
+            ("LIB001", 100.0),
+            ("LIB002", 400.0),
+        ]
+
+    def test_buckets(self):
+        subscribers = self.make_subscribers()
+        aging = DebtAging.from_subscribers(subscribers)
+        assert len(aging) == 5
+        assert aging.overdue_days("2024-05-01").tolist() == [91, 61, 1, 0, 0]
+        report = aging.report("2024-05-01")
+        assert report.labels == ("0-30", "30-60", "60+")
+        assert report.library_ids == ["LIB001", "LIB002", "LIB003"]
+        assert report.counts.tolist() == [[1, 0, 2], [0, 0, 0], [0, 0, 0]]
+        assert report.costs.tolist() == [[300.0, 0, 300.0], [0, 0, 0], [0, 0, 0]]
+        counts, costs = report.totals()
+        assert counts.tolist() == [1, 0, 2] and costs.sum() == 600.0
+        # 30 дней просрочки — ещё первая корзина, 31 — уже вторая.
+        assert aging.report("2024-03-01").counts[0].tolist() == [1, 0, 0]
+        assert aging.report("2024-03-02").counts[0].tolist() == [1, 1, 0]
+        with pytest.raises(ValueError):
+            DebtAging.from_subscribers(subscribers, edges=(60, 30))
+
+    def test_matches_subscribers_and_ledger(self):
+        rng = random.Random(3)
+        subscribers = []
+        for i in range(30):
+            subscriber = Subscriber("Абонент", f"LIB{i:03}", 20)
+            for j in range(rng.randrange(1, 20)):
+                issue = date(2024, 1, 1) + timedelta(days=rng.randrange(200))
+                book = Book("Автор", f"Книга{j}", 2000, "АСТ", rng.randrange(1, 500))
+                subscriber.add_book(book, issue.isoformat())
+                if rng.random() < 0.2:
+                    loan = subscriber[len(subscriber) - 1]
+                    loan.mark_returned()
+                    loan._returned_day = issue.toordinal() + rng.randrange(90)
+            subscribers.append(subscriber)
+        aging = DebtAging.from_subscribers(subscribers, edges=(7, 30, 90))
+        table = ledger_table(subscribers)
+        from_ledger = DebtAging.from_ledger(table, (7, 30, 90))
+        restored = subscribers_from_ledger(table, size=20)
+        for as_of in ("2024-03-01", "2024-06-15", "2025-01-01"):
+            report = aging.report(as_of)
+            assert from_ledger.report(as_of).costs.tolist() == report.costs.tolist()
+            for row, subscriber in enumerate(subscribers):
+                overdue = subscriber.find_overdue_books(as_of)
+                assert report.counts[row].sum() == len(overdue)
+                assert len(restored[row].find_overdue_books(as_of)) == len(overdue)
+                assert report.costs[row].sum() == pytest.approx(
+                    subscriber.calculate_debt_cost(as_of)
+                )